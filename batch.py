@@ -0,0 +1,144 @@
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Set
+
+
+@dataclass
+class BatchStats:
+    """
+    Outcome of a batch run.
+    """
+    submitted: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def read_queries(path: str) -> Iterator[dict]:
+    """
+    Stream queries from a JSONL file (one object with a "query" field per line) or a CSV file
+    with a "query" column. An "id" field/column is optional; the 1-based row number is used otherwise.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row_number, row in enumerate(csv.DictReader(f), start=1):
+                yield {"id": row.get("id") or str(row_number), "query": row["query"]}
+        return
+
+    with open(path, encoding="utf-8") as f:
+        for row_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            yield {"id": str(row.get("id", row_number)), "query": row["query"]}
+
+
+def load_completed(output_path: str) -> Set[str]:
+    """
+    Ids already written successfully to `output_path`, so a restarted batch can skip them.
+    Failed rows are retried; a truncated last line from a crash is ignored.
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                completed.add(str(record["id"]))
+    return completed
+
+
+async def run_batch(queries: Iterable[dict], process: Callable[[str], dict], output_path: str,
+                    concurrency: int = 4, resume: bool = True,
+                    prefetch: Optional[Callable[[List[dict]], object]] = None,
+                    prefetch_chunk: int = 32) -> BatchStats:
+    """
+    Run `process(query)` for every query with at most `concurrency` in flight, appending one
+    JSON line per finished query to `output_path` as soon as it completes.
+    `process` is a blocking function; it runs on worker threads. With `prefetch`, queries still
+    to run are passed to it in chunks of `prefetch_chunk` (on a worker thread) just before they
+    are queued, e.g. to warm a cache; earlier chunks keep running meanwhile.
+    """
+    stats = BatchStats()
+    completed = load_completed(output_path) if resume else set()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    start = time.perf_counter()
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        def write(record: dict) -> None:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    queue.task_done()
+                    return
+                started = time.perf_counter()
+                try:
+                    result = await asyncio.to_thread(process, item["query"])
+                    record = {"id": item["id"], "query": item["query"], "status": "ok", "result": result}
+                    stats.succeeded += 1
+                except Exception as e:
+                    logging.error(f"Batch query {item['id']} failed: {e}")
+                    record = {"id": item["id"], "query": item["query"], "status": "error", "error": str(e)}
+                    stats.failed += 1
+                record["elapsed"] = round(time.perf_counter() - started, 3)
+                write(record)
+                queue.task_done()
+
+        async def submit(chunk: List[dict]) -> None:
+            if prefetch is not None:
+                try:
+                    await asyncio.to_thread(prefetch, chunk)
+                except Exception as e:
+                    logging.warning(f"Batch prefetch failed: {e}")
+            for item in chunk:
+                stats.submitted += 1
+                # Blocks when the queue is full, so huge inputs are never loaded all at once.
+                await queue.put(item)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        chunk: List[dict] = []
+        for item in queries:
+            if item["id"] in completed:
+                stats.skipped += 1
+                continue
+            chunk.append(item)
+            if prefetch is None or len(chunk) >= prefetch_chunk:
+                await submit(chunk)
+                chunk = []
+        if chunk:
+            await submit(chunk)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    stats.elapsed = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def run_batch_sync(queries: Iterable[dict], process: Callable[[str], dict], output_path: str,
+                   concurrency: int = 4, resume: bool = True,
+                   prefetch: Optional[Callable[[List[dict]], object]] = None,
+                   prefetch_chunk: int = 32) -> BatchStats:
+    """
+    Blocking wrapper around `run_batch`.
+    """
+    return asyncio.run(run_batch(queries, process, output_path, concurrency=concurrency, resume=resume,
+                                 prefetch=prefetch, prefetch_chunk=prefetch_chunk))
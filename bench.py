@@ -0,0 +1,266 @@
+"""
+Offline benchmark suite: local stub servers stand in for HasData and Groq, and the client
+code (fetch_events, BaseAgent._send_request, SummaryAgent.summarize and the pipelines) is
+driven through them. Prints throughput, latency percentiles and peak traced memory per
+scenario as JSON, so runs can be compared between commits without spending API credits.
+
+Usage: python bench.py [--requests 200] [--concurrency 8] [--latency 0.02] [--error-rate 0.0]
+                       [--events-count 10] [--completion-words 60] [--page-bytes 65536]
+                       [--scenarios fetch_events,send_request] [--output bench.json]
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+from stub_servers import StubConfig
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = ("fetch_events", "send_request", "summarize", "summarize_coalesced", "summary_pipeline", "events_pipeline",
+             "crew_pipeline")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class StubProcess:
+    """
+    A stub server in a child process, so its allocations and GIL time are not counted
+    against the client being measured.
+    """
+
+    def __init__(self, config: StubConfig, tls: bool = False):
+        self.config = config
+        self.tls = tls
+        self.base_url = None
+        self.cafile = None
+        self._process = None
+
+    def __enter__(self):
+        command = [sys.executable, os.path.join(HERE, "stub_servers.py")]
+        if self.tls:
+            command.append("--tls")
+        for name, value in asdict(self.config).items():
+            if name != "completion_text":
+                command += [f"--{name.replace('_', '-')}", str(value)]
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        info = json.loads(self._process.stdout.readline())
+        self.base_url, self.cafile = info["base_url"], info["cafile"]
+        return self
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.wait()
+
+
+def measure(operation, count, concurrency, trace_memory=False):
+    """
+    Call `operation(i)` for i in range(count) on `concurrency` threads. An operation fails
+    when it raises or returns a falsy value.
+    """
+    latencies = []
+    errors = 0
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            ok = bool(operation(i))
+        except Exception as e:
+            logging.warning(f"Operation failed: {e!r}")
+            ok = False
+        return time.perf_counter() - start, ok
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for latency, ok in executor.map(timed, range(count)):
+            latencies.append(latency)
+            errors += not ok
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return latencies, errors, elapsed, peak
+
+
+def run_scenario(operation, count, concurrency):
+    """
+    Time the scenario untraced, then repeat it under tracemalloc for the memory peak
+    (tracing slows allocation-heavy code too much to time both in one pass).
+    """
+    latencies, errors, elapsed, _ = measure(operation, count, concurrency)
+    _, _, _, peak = measure(operation, count, concurrency, trace_memory=True)
+    return {
+        "requests": count,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(count / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p90": round(percentile(latencies, 90) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2),
+            "mean": round(statistics.mean(latencies) * 1000, 2),
+        },
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def build_scenarios(hasdata_url, groq_url, hasdata_cafile, max_attempts):
+    """
+    Point the clients at the stub servers and return {name: operation}. Rate limits are
+    lifted so the benchmark measures the client rather than our API quota; retries and
+    backoff keep their production settings.
+    """
+    os.environ.setdefault("GROC_API_KEY", "stub-key")
+    os.environ.setdefault("HASDATA_API_KEY", "stub-key")
+    import ssl
+    from urllib.parse import urlparse
+
+    import hasdata_client
+    from resilience import Resilience
+    from singleflight import SingleFlight
+    try_module = importlib.import_module("try")
+    logging.getLogger().setLevel(logging.WARNING)
+
+    hasdata = urlparse(hasdata_url)
+    hasdata_client.configure_pool(hasdata.hostname, hasdata.port, context=ssl.create_default_context(cafile=hasdata_cafile))
+    hasdata_client.configure_cache(enabled=False)
+    hasdata_client.resilience = Resilience("hasdata", rate=1e9, burst=1e9, max_attempts=max_attempts)
+
+    completions_url = f"{groq_url}/openai/v1/chat/completions"
+    groq_resilience = Resilience("groq", rate=1e9, burst=1e9, max_attempts=max_attempts)
+    base_agent = try_module.BaseAgent("stub-key", completions_url, "llama-3.3-70b-versatile", resilience=groq_resilience)
+    summary_agent = try_module.SummaryAgent("stub-key", try_module.CrewAIAgent(), resilience=groq_resilience)
+    summary_agent.base_url = completions_url
+    # The bench's own in-flight table, so calls are not coalesced with anything outside the scenario.
+    base_agent.in_flight = summary_agent.in_flight = SingleFlight("bench")
+    coalescing_agent = try_module.SummaryAgent("stub-key", try_module.CrewAIAgent(), resilience=groq_resilience)
+    coalescing_agent.base_url = completions_url
+    coalescing_agent.in_flight = SingleFlight("bench_coalesced")
+    document = try_module.ContentFetcher.fetch(f"{groq_url}/docs/sample/") or ""
+    # The stub pages use the Read the Docs theme markup; its content wrappers must not be taken for navigation.
+    assert "documentation paragraph" in document and "Stub footer" not in document, "text extraction lost the page content"
+
+    def fetch_events(i):
+        events = hasdata_client.fetch_events(f"City {i % 50}", "today", "any", "music", use_cache=False)
+        return "error" not in events
+
+    def send_request(i):
+        return base_agent._send_request([{"role": "user", "content": f"Benchmark prompt {i}"}])
+
+    def summarize(i):
+        # A different prompt per call: identical concurrent prompts would be coalesced into one request.
+        return summary_agent.summarize(f"Request {i}.\n{document}")
+
+    def summarize_coalesced(i):
+        # The same prompt on every call, so concurrent callers share one upstream request.
+        return coalescing_agent.summarize(document)
+    summarize_coalesced.stats = coalescing_agent.in_flight.stats.as_dict
+
+    def summary_pipeline(i):
+        content = try_module.ContentFetcher.fetch(f"{groq_url}/docs/page-{i}/")
+        return content and summary_agent.summarize(content)
+
+    import crew
+
+    def events_pipeline(i):
+        inputs = crew.prepare_inputs(f"music events in City {i % 50} today")
+        return "error" not in crew.fetch_events_for(inputs)
+
+    scenarios = {
+        "fetch_events": fetch_events,
+        "send_request": send_request,
+        "summarize": summarize,
+        "summarize_coalesced": summarize_coalesced,
+        "summary_pipeline": summary_pipeline,
+        "events_pipeline": events_pipeline,
+    }
+    try:
+        import crewai  # noqa: F401
+    except ImportError:
+        scenarios["crew_pipeline"] = "crewai is not installed"
+    else:
+        # litellm's OpenAI provider honors OPENAI_BASE_URL, so the crew's GPT-4 calls hit the stub.
+        os.environ["OPENAI_BASE_URL"] = f"{groq_url}/openai/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+        os.environ["WEATHER_PROVIDER"] = "open-meteo"
+        os.environ["WEATHER_GEOCODING_URL"] = f"{groq_url}/v1/search"
+        os.environ["WEATHER_FORECAST_URL"] = f"{groq_url}/v1/forecast"
+        scenarios["crew_pipeline"] = lambda i: crew.recommend(f"music events in City {i % 50} today")["recommendation"]
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub latency per response in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stub responses that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--events-count", type=int, default=10)
+    parser.add_argument("--completion-words", type=int, default=60)
+    parser.add_argument("--page-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--max-attempts", type=int, default=4)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    config = StubConfig(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        events_count=args.events_count,
+        completion_words=args.completion_words,
+        page_bytes=args.page_bytes,
+    )
+    report = {
+        "python": platform.python_version(),
+        "stub": {name: value for name, value in asdict(config).items() if name != "completion_text"},
+        "scenarios": {},
+    }
+    # HasData is HTTPS-only in the client; the Groq-compatible stub is plain HTTP.
+    with StubProcess(config, tls=True) as hasdata_stub, StubProcess(config) as groq_stub:
+        scenarios = build_scenarios(hasdata_stub.base_url, groq_stub.base_url, hasdata_stub.cafile, args.max_attempts)
+        for name in selected:
+            operation = scenarios[name]
+            if isinstance(operation, str):
+                report["scenarios"][name] = {"skipped": operation}
+                continue
+            logging.warning(f"Running {name}...")
+            report["scenarios"][name] = run_scenario(operation, args.requests, args.concurrency)
+            if hasattr(operation, "stats"):
+                report["scenarios"][name]["single_flight"] = operation.stats()
+
+    output = json.dumps(report, indent=4)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark a fresh HTTPS connection per call (the old `fetch_events` behaviour)
+against the pooled keep-alive client, using a local stub HTTPS server.
+
+Usage: python bench_connection_pool.py [--requests N] [--threads T] [--pool-size P]
+"""
+import argparse
+import http.client
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from connection_pool import HTTPSConnectionPool
+from stub_servers import StubServer
+
+ENDPOINT = "/scrape/google/events?q=Events+in+Dhaka+music"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(label, call, requests_count, threads):
+    latencies = []
+
+    def timed(_):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(timed, range(requests_count)))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": label,
+        "requests": requests_count,
+        "requests_per_sec": round(requests_count / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    with StubServer(tls=True) as server:
+        def new_connection_per_call():
+            conn = http.client.HTTPSConnection(server.host, server.port, context=server.client_context)
+            try:
+                conn.request("GET", ENDPOINT)
+                conn.getresponse().read()
+            finally:
+                conn.close()
+
+        pool = HTTPSConnectionPool(server.host, server.port, max_size=args.pool_size, context=server.client_context)
+
+        def pooled():
+            pool.request("GET", ENDPOINT)
+
+        results = [
+            run("new-connection-per-call", new_connection_per_call, args.requests, args.threads),
+            run("pooled-keep-alive", pooled, args.requests, args.threads),
+        ]
+        results[1]["connections_created"] = pool.stats.created
+        pool.close()
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
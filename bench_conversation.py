@@ -0,0 +1,75 @@
+"""
+Simulate new.py's multi-turn chat offline: a large page is summarized, then follow-up questions
+with retrieved excerpts are answered, and every prompt is sized with and without the rolling
+budget of conversation.ConversationManager. No API calls are made; answers are canned text.
+
+Usage: python bench_conversation.py [--page-tokens 6000] [--questions 8] [--excerpt-tokens 700]
+                                    [--answer-tokens 150] [--max-tokens 1500]
+"""
+import argparse
+import json
+
+from chunking import estimate_tokens
+from conversation import ConversationManager
+
+SYSTEM_PROMPT = "You are an AI assistant helping summarize and answer questions."
+
+
+def filler(label, tokens):
+    """
+    About `tokens` tokens of text, by the same estimate the manager uses.
+    """
+    sentence = f"{label} sentence with some representative words about the documented project. "
+    text = sentence
+    while estimate_tokens(text) < tokens:
+        text += sentence
+    return text
+
+
+def simulate(args):
+    conversation = ConversationManager(SYSTEM_PROMPT, max_prompt_tokens=args.max_tokens)
+    full_history = [{"role": "system", "content": SYSTEM_PROMPT}]
+
+    page_request = f"Summarize the following content: {filler('Page', args.page_tokens)}"
+    page_turn = conversation.add("user", page_request, pinned=True)
+    full_history.append({"role": "user", "content": page_request})
+    conversation.messages()
+    unmanaged = [sum(estimate_tokens(message["content"]) for message in full_history)]
+
+    summary = filler("Summary", args.answer_tokens)
+    conversation.summarize(page_turn, "Summarize the documentation page.")
+    conversation.add("assistant", summary, pinned=True)
+    full_history.append({"role": "assistant", "content": summary})
+
+    for i in range(args.questions):
+        question = f"Question {i + 1} about the documentation?"
+        request = f"Relevant excerpts from the document:\n{filler(f'Excerpt {i}', args.excerpt_tokens)}\n\nQuestion: {question}"
+        question_turn = conversation.add("user", request)
+        full_history.append({"role": "user", "content": request})
+        conversation.messages()
+        unmanaged.append(sum(estimate_tokens(message["content"]) for message in full_history))
+
+        answer = filler(f"Answer {i}", args.answer_tokens)
+        conversation.add("assistant", answer)
+        full_history.append({"role": "assistant", "content": answer})
+        conversation.summarize(question_turn, f"Question: {question}")
+
+    return [
+        dict(report.__dict__, unmanaged_tokens=tokens, within_budget=report.prompt_tokens <= args.max_tokens)
+        for report, tokens in zip(conversation.reports, unmanaged)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page-tokens", type=int, default=6000)
+    parser.add_argument("--questions", type=int, default=8)
+    parser.add_argument("--excerpt-tokens", type=int, default=700)
+    parser.add_argument("--answer-tokens", type=int, default=150)
+    parser.add_argument("--max-tokens", type=int, default=1500, help="ConversationManager prompt budget")
+    args = parser.parse_args()
+    print(json.dumps({"max_prompt_tokens": args.max_tokens, "prompts": simulate(args)}, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Run the crew pipeline in DAG and sequential mode against the local Groq-compatible stub and
+report which model each task ran on, per the "model_route" trace spans. Exits non-zero when a
+task listed in CREW_LARGE_TASKS ran on anything but CREW_LARGE_MODEL, or when a task was tried
+on more models than its cascade has. Needs crewai; no API credits are spent.
+
+Usage: python bench_crew_routing.py [--modes dag,sequential] [--latency 0.01]
+"""
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+
+from bench import StubProcess
+from stub_servers import StubConfig
+
+
+def task_models(tracer):
+    """
+    {task: [models tried, in order]} from the recorded "model_route" spans.
+    """
+    models = defaultdict(list)
+    for span in sorted(tracer.spans, key=lambda span: span.start):
+        if span.name == "model_route" and span.attrs.get("router") == "crew":
+            models[span.attrs["task"]].append(span.attrs["model"])
+    return dict(models)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", default="dag,sequential")
+    parser.add_argument("--latency", type=float, default=0.01, help="Stub latency per response, seconds")
+    args = parser.parse_args()
+    try:
+        import crewai  # noqa: F401
+    except ImportError:
+        print(json.dumps({"skipped": "crewai is not installed"}))
+        return
+
+    with StubProcess(StubConfig(latency=args.latency)) as stub:
+        # litellm's OpenAI provider honors OPENAI_BASE_URL, so the crew's calls hit the stub.
+        os.environ["OPENAI_BASE_URL"] = f"{stub.base_url}/openai/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+        os.environ["WEATHER_PROVIDER"] = "open-meteo"
+        os.environ["WEATHER_GEOCODING_URL"] = f"{stub.base_url}/v1/search"
+        os.environ["WEATHER_FORECAST_URL"] = f"{stub.base_url}/v1/forecast"
+        import crew
+        from tracing import tracer
+        if not crew.CREW_MODEL_ROUTING:
+            print(json.dumps({"skipped": "CREW_MODEL_ROUTING is off"}))
+            return
+
+        report = {"large_model": crew.CREW_LARGE_MODEL, "large_tasks": crew.CREW_LARGE_TASKS, "modes": {}}
+        problems = []
+        for mode in (mode.strip() for mode in args.modes.split(",") if mode.strip()):
+            crew.EXECUTION_MODE = mode
+            tracer.reset()
+            inputs = crew.prepare_inputs("music events in Dhaka today")
+            inputs["events_context"] = "No events were found for these inputs."
+            crew.run_pipeline(inputs)
+            models = task_models(tracer)
+            report["modes"][mode] = models
+            for task, tried in models.items():
+                cascade = crew.get_crew_router().route(task, 0)
+                if task in crew.CREW_LARGE_TASKS and tried != [crew.CREW_LARGE_MODEL]:
+                    problems.append(f"{mode}: {task} ran on {tried}, expected only {crew.CREW_LARGE_MODEL}")
+                if len(tried) > len(cascade):
+                    problems.append(f"{mode}: {task} was tried {len(tried)} times")
+            if "recommendation_task" not in models:
+                problems.append(f"{mode}: recommendation_task was not routed on its own")
+        report["problems"] = problems
+    print(json.dumps(report, indent=4))
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
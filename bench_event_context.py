@@ -0,0 +1,62 @@
+"""
+Compare the prompt size of the fetched events passed to the Event Planner: the full
+pretty-printed HasData payload versus the compact, field-pruned serialization from
+event_context, for several result-set sizes.
+
+Usage: python bench_event_context.py [--counts 5,10,20,50] [--max-tokens 800]
+"""
+import argparse
+import json
+import time
+
+from event_context import serialize_events, token_comparison
+
+
+def realistic_events(count):
+    """
+    HasData-shaped events with the bulky fields real responses carry (long descriptions,
+    thumbnails, images, ticket links, venue ratings).
+    """
+    description = ("Join us for an evening of live music, food stalls and workshops for all ages. "
+                   "Doors open an hour early; bring your own blanket for the open-air area. ") * 4
+    return {
+        "requestMetadata": {"status": "ok", "query": "Events in Dhaka music"},
+        "events": [
+            {
+                "title": f"Dhaka Music Festival night {i}",
+                "date": {"startDate": "Feb 15", "when": "Sat, Feb 15, 6 – 11 PM"},
+                "address": ["Army Stadium", "Banani, Dhaka 1213, Bangladesh"],
+                "link": f"https://example.invalid/events/{i}",
+                "description": description,
+                "thumbnail": f"https://example.invalid/thumb/{i}.png?size=large&format=webp",
+                "image": f"https://example.invalid/image/{i}.jpg",
+                "eventLocationMap": {"image": f"https://example.invalid/map/{i}.png", "link": "https://maps.example.invalid"},
+                "ticketInfo": [{"source": "Tickets", "link": f"https://example.invalid/tickets/{i}", "linkType": "tickets"}],
+                "venue": {"name": "Army Stadium", "rating": 4.4, "reviews": 5210, "link": "https://example.invalid/venue"},
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--counts", default="5,10,20,50")
+    parser.add_argument("--max-tokens", type=int, default=800)
+    args = parser.parse_args()
+
+    results = []
+    for count in (int(c) for c in args.counts.split(",")):
+        events = realistic_events(count)
+        start = time.perf_counter()
+        context = serialize_events(events, max_tokens=args.max_tokens)
+        elapsed = time.perf_counter() - start
+        result = token_comparison(events, context)
+        result["events_in_context"] = sum(1 for line in context.splitlines() if line.startswith("{"))
+        result["serialize_ms"] = round(elapsed * 1000, 3)
+        results.append(result)
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
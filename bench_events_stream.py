@@ -0,0 +1,108 @@
+"""
+Compare ways of getting a large event search result out of HasData, against a local stub:
+
+- single_payload: one response holding every event, parsed whole and pretty-printed
+  (what fetch_events + json.dumps(indent=4) do).
+- pages_materialized: every page fetched one after another into one payload, then pretty-printed.
+- stream_sequential / stream_concurrent: iter_events with 1 / --concurrency pages in flight,
+  written as NDJSON one event at a time.
+
+Reports total latency, time to first event and peak traced memory per mode.
+
+Usage: python bench_events_stream.py [--events 2000] [--page-size 10] [--latency 0.03] [--concurrency 4]
+"""
+import argparse
+import json
+import os
+import ssl
+import time
+import tracemalloc
+from urllib.parse import urlparse
+
+import hasdata_client
+from bench import StubProcess
+from resilience import Resilience
+from stub_servers import StubConfig
+
+
+def point_client_at(stub):
+    url = urlparse(stub.base_url)
+    hasdata_client.configure_pool(url.hostname, url.port, context=ssl.create_default_context(cafile=stub.cafile))
+
+
+def single_payload(args, out):
+    start = time.perf_counter()
+    events = hasdata_client.fetch_events("Dhaka", "today", "any", "music", api_key="stub-key", use_cache=False)
+    out.write(json.dumps(events, indent=4))
+    elapsed = time.perf_counter() - start
+    return len(events.get("events", [])), elapsed, elapsed
+
+
+def pages_materialized(args, out):
+    start = time.perf_counter()
+    payload = {"events": []}
+    for page in range(args.events // args.page_size):
+        result = hasdata_client._fetch_page("Dhaka", "music", page * args.page_size, "stub-key", None)
+        payload["events"].extend(result.get("events", []))
+        if len(result.get("events", [])) < args.page_size:
+            break
+    first_event = time.perf_counter() - start
+    out.write(json.dumps(payload, indent=4))
+    return len(payload["events"]), time.perf_counter() - start, first_event
+
+
+def streamed(concurrency):
+    def run(args, out):
+        stats = hasdata_client.PageStats()
+        count = hasdata_client.write_ndjson(hasdata_client.iter_events(
+            "Dhaka", "today", "any", "music", api_key="stub-key", use_cache=False,
+            max_pages=args.events // args.page_size + 1, page_size=args.page_size,
+            concurrency=concurrency, stats=stats), out)
+        return count, stats.elapsed, stats.time_to_first_event
+    return run
+
+
+def measure(mode, args):
+    """
+    Time one run, then repeat it under tracemalloc for the memory peak.
+    """
+    with open(os.devnull, "w") as out:
+        events, elapsed, first_event = mode(args, out)
+        tracemalloc.start()
+        mode(args, out)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        "events": events,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "time_to_first_event_ms": round((first_event or 0.0) * 1000, 1),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=hasdata_client.EVENTS_PAGE_SIZE)
+    parser.add_argument("--latency", type=float, default=0.03, help="Stub latency per response, seconds")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    hasdata_client.resilience = Resilience("hasdata", rate=1e9, burst=1e9)
+    report = {"events": args.events, "page_size": args.page_size, "latency_s": args.latency, "modes": {}}
+    whole = StubConfig(latency=args.latency, events_count=args.events, events_total=args.events)
+    with StubProcess(whole, tls=True) as stub:
+        point_client_at(stub)
+        report["modes"]["single_payload"] = measure(single_payload, args)
+
+    paged = StubConfig(latency=args.latency, events_count=args.page_size, events_total=args.events)
+    with StubProcess(paged, tls=True) as stub:
+        point_client_at(stub)
+        report["modes"]["pages_materialized"] = measure(pages_materialized, args)
+        report["modes"]["stream_sequential"] = measure(streamed(1), args)
+        report["modes"]["stream_concurrent"] = measure(streamed(args.concurrency), args)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark for the query parser: queries/sec of the original per-call implementation,
+`parse_user_input` and `parse_many` on a corpus of realistic queries.
+
+Usage: python bench_query_parser.py [--queries N] [--repeat R]
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import re
+import time
+from datetime import datetime
+
+from query_parser import parse_many, parse_user_input
+
+CITIES = ["Dhaka", "Bangkok", "New York", "London", "San Francisco", "Chittagong", "Kuala Lumpur"]
+DATES = ["today", "tomorrow", "this weekend", "next week", "2025-02-15", "14/03/2025", "2025-02-30", ""]
+PREFERENCES = ["outdoor", "indoor", "family-friendly", "music", "sports", "adventure"]
+TOPICS = ["music festivals", "jazz nights", "food markets", "football", "tech meetups", ""]
+TEMPLATES = [
+    "I want to find {prefs} events in {city} on {date} about {topic}",
+    "{prefs} things to do {date} in {city}",
+    "Any {prefs} events {date}? Something about {topic} in {city}",
+    "what's happening in {city} {date}",
+    "show me {prefs} stuff about {topic}",
+]
+
+
+def legacy_parse_user_input(user_input):
+    """
+    The original crew.py parser, kept here as the benchmark baseline.
+    """
+    location_pattern = r"in\s([a-zA-Z\s]+)"
+    date_pattern = r"(this weekend|tomorrow|next week|today|\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4})"
+    preferences_pattern = r"(outdoor|indoor|family-friendly|music|sports|adventure)"
+    event_name_pattern = r"about\s([a-zA-Z\s]+)"
+
+    location_match = re.search(location_pattern, user_input)
+    location = location_match.group(1).strip() if location_match else None
+
+    date_match = re.search(date_pattern, user_input)
+    date_raw = date_match.group(0).strip() if date_match else None
+    date = None
+    if date_raw:
+        try:
+            if "-" in date_raw or "/" in date_raw:
+                date = datetime.strptime(date_raw, "%Y-%m-%d").strftime("%Y-%m-%d") if "-" in date_raw else datetime.strptime(date_raw, "%d/%m/%Y").strftime("%Y-%m-%d")
+            else:
+                date = date_raw
+        except ValueError:
+            print(f"Error: Invalid date format '{date_raw}'. Please use YYYY-MM-DD or DD/MM/YYYY.")
+
+    preferences_matches = re.findall(preferences_pattern, user_input)
+    preferences = ", ".join(preferences_matches) if preferences_matches else None
+
+    event_name_match = re.search(event_name_pattern, user_input)
+    event_name = event_name_match.group(1).strip() if event_name_match else None
+
+    return {
+        "location": location,
+        "date": date,
+        "preferences": preferences,
+        "event_name": event_name
+    }
+
+
+def build_corpus(size, seed=42):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        template = rng.choice(TEMPLATES)
+        prefs = " ".join(rng.sample(PREFERENCES, rng.randint(0, 2)))
+        query = template.format(city=rng.choice(CITIES), date=rng.choice(DATES), prefs=prefs, topic=rng.choice(TOPICS))
+        corpus.append(" ".join(query.split()))
+    return corpus
+
+
+def measure(label, fn, corpus, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        # Invalid dates print an error; keep that out of the timing output.
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn(corpus)
+            best = min(best, time.perf_counter() - start)
+    return {"parser": label, "queries": len(corpus), "queries_per_sec": round(len(corpus) / best)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.queries)
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = [legacy_parse_user_input(q) for q in corpus]
+        assert [parse_user_input(q) for q in corpus] == expected, "parse_user_input output differs from baseline"
+        assert list(parse_many(corpus)) == expected, "parse_many output differs from baseline"
+
+    results = [
+        measure("legacy", lambda c: [legacy_parse_user_input(q) for q in c], corpus, args.repeat),
+        measure("parse_user_input", lambda c: [parse_user_input(q) for q in c], corpus, args.repeat),
+        measure("parse_many", lambda c: list(parse_many(c)), corpus, args.repeat),
+    ]
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
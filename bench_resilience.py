@@ -0,0 +1,192 @@
+"""
+Drive resilience.Resilience against local stub servers that answer with scripted 429 / 5xx
+responses (stub_servers.scripted_handler), and check the retry, Retry-After, token-bucket and
+circuit-breaker behaviour: requests made, attempts and retries counted, time waited, and the
+breaker going open -> half-open -> closed (or back to open). Backoff sleeps are recorded rather
+than slept, except for the breaker's reset timeout. Prints a JSON report and exits non-zero if
+any check fails.
+
+Usage: python bench_resilience.py
+"""
+import json
+import sys
+import time
+
+import requests
+
+from resilience import CircuitOpenError, Resilience, RetryableError, check_status
+from stub_servers import StubServer, scripted_handler
+
+
+class Checks:
+    """
+    Collects failed expectations per scenario instead of stopping at the first one.
+    """
+
+    def __init__(self):
+        self.failures = []
+        self.scenario = ""
+
+    def expect(self, condition, message):
+        if not condition:
+            self.failures.append(f"{self.scenario}: {message}")
+
+
+def scripted(responses):
+    return StubServer(scripted_handler(responses))
+
+
+def get(url):
+    """
+    One attempt: GET `url` and raise RetryableError for a throttled or failed response.
+    """
+    response = requests.get(url, timeout=5)
+    check_status(response.status_code, response.headers)
+    return response.status_code
+
+
+def retry_sequence(checks):
+    """
+    429 with Retry-After, then 503 and 500, then success: four requests, three retries.
+    Retry-After is honored but capped at max_delay; the 429 does not count against the breaker.
+    """
+    slept = []
+    policy = Resilience("scripted", rate=1e9, burst=1e9, max_attempts=4, base_delay=0.5, max_delay=5.0,
+                        failure_threshold=3, sleep=slept.append)
+    with scripted([(429, {"Retry-After": "60"}), (503, {}), (500, {})]) as stub:
+        status = policy.call(lambda: get(f"{stub.base_url}/v1/search?name=Dhaka"))
+        requests_seen = stub.handler_class.requests_seen
+    stats = policy.stats()
+    checks.expect(status == 200, f"final status {status}, expected 200")
+    checks.expect(requests_seen == 4, f"{requests_seen} requests reached the stub, expected 4")
+    checks.expect((stats["attempts"], stats["retries"], stats["failures"]) == (4, 3, 3),
+                  f"attempts/retries/failures {stats['attempts']}/{stats['retries']}/{stats['failures']}, expected 4/3/3")
+    checks.expect(len(slept) == 3 and slept[0] == 5.0, f"slept {slept}, expected Retry-After 60 capped to 5.0 first")
+    checks.expect(len(slept) == 3 and 0 <= slept[1] <= 1.0 and 0 <= slept[2] <= 2.0,
+                  f"backoff sleeps {slept[1:]} outside the full-jitter bounds (1.0, 2.0)")
+    checks.expect(abs(stats["backoff_seconds"] - sum(slept)) < 1e-9, "backoff_seconds does not match the time slept")
+    checks.expect(stats["breaker_state"] == "closed", f"breaker {stats['breaker_state']}, expected closed")
+    return dict(stats, requests_seen=requests_seen, slept=[round(delay, 3) for delay in slept])
+
+
+def retries_exhausted(checks):
+    """
+    Only 503s: the last RetryableError propagates after max_attempts requests.
+    """
+    slept = []
+    policy = Resilience("scripted", rate=1e9, burst=1e9, max_attempts=3, failure_threshold=10, sleep=slept.append)
+    with scripted([(503, {})] * 5) as stub:
+        try:
+            policy.call(lambda: get(f"{stub.base_url}/v1/search?name=Dhaka"))
+            raised = None
+        except RetryableError as e:
+            raised = e.status
+        requests_seen = stub.handler_class.requests_seen
+    stats = policy.stats()
+    checks.expect(raised == 503, f"raised {raised}, expected RetryableError with status 503")
+    checks.expect(requests_seen == 3, f"{requests_seen} requests reached the stub, expected 3")
+    checks.expect((stats["attempts"], stats["retries"], stats["failures"]) == (3, 2, 3),
+                  f"attempts/retries/failures {stats['attempts']}/{stats['retries']}/{stats['failures']}, expected 3/2/3")
+    checks.expect(len(slept) == 2, f"slept {len(slept)} times, expected 2")
+    return dict(stats, requests_seen=requests_seen)
+
+
+def throttling_does_not_trip(checks):
+    """
+    429s are back-pressure, not an outage: even with failure_threshold=1 the breaker stays closed.
+    """
+    policy = Resilience("scripted", rate=1e9, burst=1e9, max_attempts=3, failure_threshold=1, sleep=lambda _: None)
+    with scripted([(429, {"Retry-After": "1"}), (429, {"Retry-After": "1"})]) as stub:
+        status = policy.call(lambda: get(f"{stub.base_url}/v1/search?name=Dhaka"))
+    stats = policy.stats()
+    checks.expect(status == 200, f"final status {status}, expected 200")
+    checks.expect(stats["breaker_state"] == "closed", f"breaker {stats['breaker_state']}, expected closed")
+    checks.expect(stats["backoff_seconds"] == 2.0, f"waited {stats['backoff_seconds']}s, expected 2.0 (two Retry-After: 1)")
+    return stats
+
+
+def breaker_cycle(checks, trial_status):
+    """
+    Two 503s open the breaker; calls are then rejected without a request. After reset_timeout
+    one trial call goes through: a success closes the breaker, a failure re-opens it.
+    """
+    reset_timeout = 0.3
+    script = [(503, {}), (503, {})] + ([(trial_status, {})] if trial_status != 200 else [])
+    policy = Resilience("scripted", rate=1e9, burst=1e9, max_attempts=1, failure_threshold=2,
+                        reset_timeout=reset_timeout, sleep=lambda _: None)
+    states = []
+    with scripted(script) as stub:
+        url = f"{stub.base_url}/v1/search?name=Dhaka"
+        for _ in range(2):
+            try:
+                policy.call(lambda: get(url))
+            except RetryableError:
+                pass
+        states.append(policy.breaker.state)
+        try:
+            policy.call(lambda: get(url))
+            rejected = False
+        except CircuitOpenError:
+            rejected = True
+        requests_while_open = stub.handler_class.requests_seen
+        time.sleep(reset_timeout + 0.05)
+        states.append(policy.breaker.state)
+        try:
+            policy.call(lambda: get(url))
+        except RetryableError:
+            pass
+        states.append(policy.breaker.state)
+        requests_seen = stub.handler_class.requests_seen
+    stats = policy.stats()
+    expected_final = "closed" if trial_status == 200 else "open"
+    checks.expect(rejected, "call while open was not rejected with CircuitOpenError")
+    checks.expect(requests_while_open == 2, f"{requests_while_open} requests reached the stub while open, expected 2")
+    checks.expect(states == ["open", "half_open", expected_final],
+                  f"breaker went {' -> '.join(states)}, expected open -> half_open -> {expected_final}")
+    checks.expect(requests_seen == 3, f"{requests_seen} requests reached the stub, expected 3 (one trial)")
+    checks.expect(stats["rejected_by_breaker"] == 1, f"rejected_by_breaker {stats['rejected_by_breaker']}, expected 1")
+    return dict(stats, states=states, requests_seen=requests_seen)
+
+
+def rate_limit(checks):
+    """
+    rate=20/s with a burst of 2: the first two of six calls go at once, the other four wait
+    0.05, 0.10, 0.15 and 0.20 seconds for their tokens (sleeps are recorded, not slept).
+    """
+    slept = []
+    policy = Resilience("scripted", rate=20, burst=2, sleep=slept.append)
+    with scripted([]) as stub:
+        for _ in range(6):
+            policy.call(lambda: get(f"{stub.base_url}/v1/search?name=Dhaka"))
+    stats = policy.stats()
+    checks.expect(len(slept) == 4, f"throttled {len(slept)} calls, expected 4")
+    # Tokens refill while the real requests run, so the waits come out slightly shorter than 0.5s.
+    checks.expect(0.3 < stats["throttled_seconds"] <= 0.5, f"throttled {stats['throttled_seconds']:.3f}s, expected about 0.5")
+    checks.expect(stats["attempts"] == 6 and stats["retries"] == 0, f"attempts/retries {stats['attempts']}/{stats['retries']}")
+    return dict(stats, slept=[round(delay, 3) for delay in slept])
+
+
+SCENARIOS = {
+    "retry_sequence": retry_sequence,
+    "retries_exhausted": retries_exhausted,
+    "throttling_does_not_trip": throttling_does_not_trip,
+    "breaker_trial_succeeds": lambda checks: breaker_cycle(checks, 200),
+    "breaker_trial_fails": lambda checks: breaker_cycle(checks, 500),
+    "rate_limit": rate_limit,
+}
+
+
+def main():
+    checks = Checks()
+    report = {}
+    for name, scenario in SCENARIOS.items():
+        checks.scenario = name
+        report[name] = scenario(checks)
+    report["failures"] = checks.failures
+    print(json.dumps(report, indent=4))
+    if checks.failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
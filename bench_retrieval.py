@@ -0,0 +1,129 @@
+"""
+Compare answering follow-up questions from the full page against answering from the top-k
+BM25 chunks: prompt tokens, index build/load time and query time. With --live, each prompt
+is also sent to a chat completions endpoint (Groq by default, or a stub via --base-url) to
+measure latency and the prompt tokens the server reports.
+
+Usage: python bench_retrieval.py [--url URL | --file PATH] [--k 4] [--chunk-tokens 200] [--live]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import requests
+
+from chunking import estimate_tokens
+from html_extract import extract_text_from_stream
+from retrieval import ChunkIndex
+
+QUESTIONS = [
+    "What is the purpose of the documentation?",
+    "How do I install the project and configure API keys?",
+    "How are tasks assigned to agents?",
+    "What tools can an agent use?",
+]
+
+TOPICS = {
+    "installation": "install the package with pip, create a virtual environment and set the API keys in a .env file",
+    "agents": "agents have a role, a goal and a backstory, and use a language model to act",
+    "tasks": "tasks describe the work, the expected output and which agent the task is assigned to",
+    "tools": "tools let an agent search the web, read files, call APIs and scrape pages",
+    "deployment": "deploy the crew as a service behind a queue with monitoring and retries",
+}
+
+
+def synthetic_document(sections_per_topic=12):
+    """
+    A documentation-like page with distinct vocabulary per section, so retrieval has signal.
+    """
+    paragraphs = []
+    for i in range(sections_per_topic):
+        for topic, sentence in TOPICS.items():
+            paragraphs.append(f"{topic.title()} part {i + 1}. In this section we explain how to {sentence}. "
+                              f"The {topic} examples build on the previous {topic} section and show more detail. " * 2)
+    return "\n\n".join(paragraphs)
+
+
+def load_document(args):
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            return f.read()
+    if args.url:
+        with requests.get(args.url, stream=True) as response:
+            response.raise_for_status()
+            return extract_text_from_stream(response.iter_content(chunk_size=16384),
+                                            encoding=response.encoding or "utf-8")
+    return synthetic_document()
+
+
+def complete(base_url, api_key, model, prompt):
+    start = time.perf_counter()
+    response = requests.post(base_url, headers={"Authorization": f"Bearer {api_key}"}, json={
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": 200,
+        "temperature": 0,
+    })
+    response.raise_for_status()
+    usage = response.json().get("usage") or {}
+    return round(time.perf_counter() - start, 3), usage.get("prompt_tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url")
+    parser.add_argument("--file")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--chunk-tokens", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="Also send the prompts to a completions endpoint")
+    parser.add_argument("--base-url", default="https://api.groq.com/openai/v1/chat/completions")
+    parser.add_argument("--model", default="llama-3.3-70b-versatile")
+    args = parser.parse_args()
+
+    document = load_document(args)
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        index = ChunkIndex.for_document(document, directory, args.chunk_tokens)
+        build_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        ChunkIndex.for_document(document, directory, args.chunk_tokens)
+        load_ms = (time.perf_counter() - start) * 1000
+        index_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+    report = {
+        "document_tokens": estimate_tokens(document),
+        "chunks": len(index.chunks),
+        "index_build_ms": round(build_ms, 2),
+        "index_load_ms": round(load_ms, 2),
+        "index_bytes": index_bytes,
+        "questions": [],
+    }
+    query_times = []
+    for question in QUESTIONS:
+        start = time.perf_counter()
+        excerpts = index.context_for(question, k=args.k)
+        query_times.append((time.perf_counter() - start) * 1000)
+        full_prompt = f"Document:\n{document}\n\nQuestion: {question}"
+        retrieval_prompt = f"Relevant excerpts:\n{excerpts}\n\nQuestion: {question}"
+        result = {
+            "question": question,
+            "full_prompt_tokens": estimate_tokens(full_prompt),
+            "top_k_prompt_tokens": estimate_tokens(retrieval_prompt),
+        }
+        if args.live:
+            api_key = os.getenv("GROC_API_KEY", "stub-key")
+            result["full_latency_s"], result["full_server_prompt_tokens"] = complete(args.base_url, api_key, args.model, full_prompt)
+            result["top_k_latency_s"], result["top_k_server_prompt_tokens"] = complete(args.base_url, api_key, args.model, retrieval_prompt)
+        report["questions"].append(result)
+    report["query_ms_mean"] = round(statistics.mean(query_times), 3)
+    full = sum(q["full_prompt_tokens"] for q in report["questions"])
+    top_k = sum(q["top_k_prompt_tokens"] for q in report["questions"])
+    report["prompt_token_reduction"] = round(1 - top_k / full, 3) if full else 0.0
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
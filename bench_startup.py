@@ -0,0 +1,81 @@
+"""
+Cold-start benchmark: how long `import <module>` takes in a fresh interpreter, with the
+heaviest imports taken from `python -X importtime`. Exits non-zero when the median exceeds
+--max-ms, so CI can catch startup regressions.
+
+Usage: python bench_startup.py [--module crew] [--runs 10] [--top 10] [--max-ms 500]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output into {module: (self_us, cumulative_us)}.
+    """
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2].strip()
+        timings[name] = (self_us, cumulative_us)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="crew")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if the median cold-start time exceeds this")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    command = [sys.executable, "-c", f"import {args.module}"]
+    # Warm the bytecode cache once; each timed run is still a fresh interpreter.
+    subprocess.run(command, cwd=HERE, env=env, check=True, capture_output=True)
+
+    wall_ms = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=HERE, env=env, check=True, capture_output=True)
+        wall_ms.append((time.perf_counter() - start) * 1000)
+
+    baseline_ms = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], cwd=HERE, env=env, check=True, capture_output=True)
+        baseline_ms.append((time.perf_counter() - start) * 1000)
+
+    traced = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {args.module}"],
+                            cwd=HERE, env=env, check=True, capture_output=True, text=True)
+    timings = parse_importtime(traced.stderr)
+    heaviest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "interpreter_ms": round(statistics.median(baseline_ms), 1),
+        "median_wall_ms": round(statistics.median(wall_ms), 1),
+        "import_overhead_ms": round(statistics.median(wall_ms) - statistics.median(baseline_ms), 1),
+        "module_cumulative_ms": round(timings.get(args.module, (0, 0))[1] / 1000, 1),
+        "heaviest_imports_self_ms": {name: round(self_us / 1000, 2) for name, (self_us, _) in heaviest},
+    }
+    print(json.dumps(report, indent=4))
+
+    if args.max_ms is not None and report["median_wall_ms"] > args.max_ms:
+        print(f"Startup regression: {report['median_wall_ms']}ms > {args.max_ms}ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
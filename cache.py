@@ -0,0 +1,357 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional, Set, Tuple
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters exposed by every cache backend so it can be sized from real traffic.
+    """
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    def as_dict(self) -> dict:
+        stats = asdict(self)
+        lookups = self.hits + self.misses
+        stats["hit_rate"] = round(self.hits / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def content_hash(value: Any) -> str:
+    """
+    Stable SHA-256 of a JSON-compatible value, independent of dict key order.
+    """
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Serialize a JSON-compatible value; the encoded length is what counts towards `max_bytes`.
+    """
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+class TTLCache:
+    """
+    In-memory cache with a per-entry TTL and LRU eviction bounded by total encoded bytes.
+    Values must be JSON-serializable; they are stored encoded so their size is exact.
+    With `stale_while_revalidate` seconds, expired entries are kept that much longer so
+    `lookup` can still return them, marked stale, while the caller refreshes them.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, default_ttl: Optional[float] = 900.0,
+                 stale_while_revalidate: float = 0.0):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str, allow_stale: bool = True) -> Optional[Tuple[Any, bool]]:
+        """
+        Return (value, fresh), where fresh is False for an expired entry still inside the
+        stale window, or None if there is no usable entry.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            blob, expires_at = entry
+            fresh = expires_at is None or expires_at > now
+            if not fresh:
+                if expires_at + self.stale_while_revalidate <= now:
+                    self._remove(key)
+                    self.stats.expirations += 1
+                    self.stats.misses += 1
+                    return None
+                if not allow_stale:
+                    self.stats.misses += 1
+                    return None
+            self._entries.move_to_end(key)
+            if fresh:
+                self.stats.hits += 1
+            else:
+                self.stats.stale_hits += 1
+        return json.loads(blob), fresh
+
+    def get(self, key: str) -> Optional[Any]:
+        found = self.lookup(key, allow_stale=False)
+        return found[0] if found is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        blob = encode_value(value)
+        if len(blob) > self.max_bytes:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (blob, expires_at)
+            self.stats.entries += 1
+            self.stats.bytes += len(blob)
+            while self.stats.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats.entries = 0
+            self.stats.bytes = 0
+
+    def _remove(self, key: str) -> None:
+        blob, _ = self._entries.pop(key)
+        self.stats.entries -= 1
+        self.stats.bytes -= len(blob)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    On-disk cache with the same interface as TTLCache, persisted in a sqlite file so it
+    survives restarts. LRU order is tracked with a last-access timestamp per row. Entry and
+    byte totals are kept in a one-row table updated in the same transaction as each insert or
+    delete, so writes never have to scan the cache.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, default_ttl: Optional[float] = 900.0,
+                 stale_while_revalidate: float = 0.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache (last_access)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_totals ("
+            " id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+        )
+        with self._transaction():
+            if self._conn.execute("SELECT 1 FROM cache_totals").fetchone() is None:
+                # First open of this file (or of one written before totals were kept): count once.
+                self._conn.execute("INSERT INTO cache_totals (id, entries, bytes) "
+                                   "SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM cache")
+        self._refresh_totals()
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _add_totals(self, entries: int, size: int) -> None:
+        """
+        Adjust the stored totals; call inside the transaction that inserted or deleted the rows.
+        """
+        self._conn.execute("UPDATE cache_totals SET entries = entries + ?, bytes = bytes + ? WHERE id = 0",
+                           (entries, size))
+
+    def _delete_rows(self, keys_and_sizes) -> int:
+        """
+        Delete the given (key, size) rows and subtract them from the totals, in the caller's transaction.
+        """
+        rows = list(keys_and_sizes)
+        if rows:
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key, _ in rows])
+            self._add_totals(-len(rows), -sum(size for _, size in rows))
+        return len(rows)
+
+    def _refresh_totals(self) -> None:
+        self.stats.entries, self.stats.bytes = self._conn.execute(
+            "SELECT entries, bytes FROM cache_totals WHERE id = 0").fetchone()
+
+    def lookup(self, key: str, allow_stale: bool = True) -> Optional[Tuple[Any, bool]]:
+        """
+        Return (value, fresh), where fresh is False for an expired entry still inside the
+        stale window, or None if there is no usable entry.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, size, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            blob, size, expires_at = row
+            fresh = expires_at is None or expires_at > now
+            if not fresh:
+                if expires_at + self.stale_while_revalidate <= now:
+                    with self._transaction():
+                        self._delete_rows([(key, size)])
+                    self._refresh_totals()
+                    self.stats.expirations += 1
+                    self.stats.misses += 1
+                    return None
+                if not allow_stale:
+                    self.stats.misses += 1
+                    return None
+            self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+            if fresh:
+                self.stats.hits += 1
+            else:
+                self.stats.stale_hits += 1
+        return json.loads(blob), fresh
+
+    def get(self, key: str) -> Optional[Any]:
+        found = self.lookup(key, allow_stale=False)
+        return found[0] if found is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        blob = encode_value(value)
+        if len(blob) > self.max_bytes:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            with self._transaction():
+                old = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, len(blob), expires_at, now),
+                )
+                self._add_totals(0 if old else 1, len(blob) - (old[0] if old else 0))
+                self._refresh_totals()
+                if self.stats.bytes > self.max_bytes:
+                    self._evict()
+            self._refresh_totals()
+
+    def _evict(self) -> None:
+        # Drop expired rows first, then least recently used rows until under budget.
+        # Runs inside set()'s transaction and only when the cache is over budget.
+        expired = self._conn.execute(
+            "SELECT key, size FROM cache WHERE expires_at IS NOT NULL AND expires_at + ? <= ?",
+            (self.stale_while_revalidate, time.time())
+        ).fetchall()
+        self.stats.expirations += self._delete_rows(expired)
+        self._refresh_totals()
+        excess = self.stats.bytes - self.max_bytes
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY last_access"):
+            if excess <= 0:
+                break
+            victims.append((key, size))
+            excess -= size
+        self.stats.evictions += self._delete_rows(victims)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            with self._transaction():
+                self._delete_rows(self._conn.execute("SELECT key, size FROM cache WHERE key = ?", (key,)).fetchall())
+            self._refresh_totals()
+
+    def clear(self) -> None:
+        with self._lock:
+            with self._transaction():
+                self._conn.execute("DELETE FROM cache")
+                self._conn.execute("UPDATE cache_totals SET entries = 0, bytes = 0 WHERE id = 0")
+            self._refresh_totals()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        return self.stats.entries
+
+
+class RefreshingCache:
+    """
+    Read-through wrapper adding stale-while-revalidate to a TTLCache or SQLiteCache created
+    with a `stale_while_revalidate` window: a stale value is returned at once and recomputed
+    on a background thread, with at most one refresh per key in flight.
+    """
+
+    def __init__(self, cache, max_refreshers: int = 2):
+        self.cache = cache
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_refreshers, thread_name_prefix="cache-refresh")
+
+    def _store(self, key: str, value: Any, ttl: Optional[float], cacheable: Optional[Callable[[Any], bool]]) -> None:
+        if cacheable is None or cacheable(value):
+            self.cache.set(key, value, ttl)
+
+    def _refresh(self, key: str, compute: Callable[[], Any], ttl: Optional[float],
+                 cacheable: Optional[Callable[[Any], bool]]) -> None:
+        try:
+            self._store(key, compute(), ttl, cacheable)
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            logging.warning(f"Background refresh of {key} failed: {e}")
+            with self._lock:
+                self.refresh_failures += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None,
+                       allow_stale: bool = True, cacheable: Optional[Callable[[Any], bool]] = None,
+                       refresh: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Return the cached value for `key`, or call `compute()` and cache its result (only when
+        `cacheable(result)` is true, if given). Stale values are recomputed with `refresh`
+        (default: `compute`) on a background thread. Pass allow_stale=False to never serve stale
+        values, e.g. in short-lived processes that would exit before a refresh finishes.
+        """
+        found = self.cache.lookup(key, allow_stale=allow_stale)
+        if found is not None:
+            value, fresh = found
+            if not fresh:
+                with self._lock:
+                    schedule = key not in self._refreshing
+                    self._refreshing.add(key)
+                if schedule:
+                    self._executor.submit(self._refresh, key, refresh or compute, ttl, cacheable)
+            return value
+        value = compute()
+        self._store(key, value, ttl, cacheable)
+        return value
+
+    def stats(self) -> dict:
+        stats = self.cache.stats.as_dict()
+        with self._lock:
+            stats.update(refreshes=self.refreshes, refresh_failures=self.refresh_failures,
+                         refreshing=len(self._refreshing))
+        return stats
@@ -0,0 +1,55 @@
+import re
+from typing import List
+
+# Rough English average for Llama/GPT tokenizers; good enough for budgeting prompts.
+CHARS_PER_TOKEN = 4
+
+_BOUNDARIES = [re.compile(r"\n\s*\n"), re.compile(r"\n"), re.compile(r"(?<=[.!?])\s+"), re.compile(r"\s+")]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the token count of `text` without a tokenizer.
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _split(text: str, max_chars: int, level: int) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    if level >= len(_BOUNDARIES):
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+    pieces = []
+    for piece in _BOUNDARIES[level].split(text):
+        if len(piece) > max_chars:
+            pieces.extend(_split(piece, max_chars, level + 1))
+        elif piece:
+            pieces.append(piece)
+
+    # Greedily pack the pieces back together up to the budget.
+    separator = "\n\n" if level == 0 else "\n" if level == 1 else " "
+    chunks, current = [], ""
+    for piece in pieces:
+        candidate = f"{current}{separator}{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """
+    Split `text` into chunks of at most `max_tokens` (estimated), preferring paragraph,
+    then line, then sentence, then word boundaries.
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1.")
+    text = text.strip()
+    if not text:
+        return []
+    return [chunk.strip() for chunk in _split(text, max_tokens * CHARS_PER_TOKEN, 0) if chunk.strip()]
@@ -0,0 +1,175 @@
+import http.client
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Errors that mean a pooled keep-alive socket was closed by the server while idle.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    http.client.CannotSendRequest,
+    http.client.ResponseNotReady,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+@dataclass
+class PoolStats:
+    """
+    Counters describing how a connection pool has been used.
+    """
+    created: int = 0
+    reused: int = 0
+    evicted_idle: int = 0
+    reconnected_stale: int = 0
+    discarded: int = 0
+
+
+@dataclass
+class PooledResponse:
+    """
+    A fully-read HTTP response, detached from the connection it arrived on.
+    """
+    status: int
+    reason: str
+    headers: http.client.HTTPMessage
+    data: bytes
+
+
+class HTTPSConnectionPool:
+    """
+    Thread-safe pool of keep-alive HTTPS connections to a single host.
+
+    At most `max_size` connections exist at once; callers block until one is free.
+    Connections idle for longer than `idle_timeout` seconds are closed instead of reused,
+    and a request that fails on a reused connection the server already dropped is
+    retried once on a fresh connection.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: Optional[int] = None,
+        max_size: int = 10,
+        idle_timeout: float = 30.0,
+        timeout: float = 30.0,
+        context=None,
+        connection_class=http.client.HTTPSConnection,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.context = context
+        self.connection_class = connection_class
+        self.stats = PoolStats()
+        self._idle: List[Tuple[http.client.HTTPConnection, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = False
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        kwargs = {"timeout": self.timeout}
+        if self.context is not None:
+            kwargs["context"] = self.context
+        conn = self.connection_class(self.host, self.port, **kwargs)
+        with self._lock:
+            self.stats.created += 1
+        return conn
+
+    def _checkout(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """
+        Take an idle connection (most recently used first) or open a new one.
+        Returns the connection and whether it was reused.
+        """
+        now = time.monotonic()
+        expired = []
+        conn = None
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed.")
+            while self._idle:
+                candidate, last_used = self._idle.pop()
+                if now - last_used > self.idle_timeout:
+                    expired.append(candidate)
+                    self.stats.evicted_idle += 1
+                    continue
+                conn = candidate
+                self.stats.reused += 1
+                break
+        for stale in expired:
+            stale.close()
+        if conn is not None:
+            return conn, True
+        return self._new_connection(), False
+
+    def _checkin(self, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        with self._lock:
+            if reusable and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                return
+            self.stats.discarded += 1
+        conn.close()
+
+    def request(self, method: str, url: str, body=None, headers: Optional[Dict[str, str]] = None) -> PooledResponse:
+        """
+        Send a request over a pooled connection and return the fully-read response.
+        """
+        headers = headers or {}
+        self._slots.acquire()
+        try:
+            conn, reused = self._checkout()
+            while True:
+                try:
+                    conn.request(method, url, body=body, headers=headers)
+                    res = conn.getresponse()
+                    data = res.read()
+                except STALE_CONNECTION_ERRORS as e:
+                    if not reused:
+                        conn.close()
+                        with self._lock:
+                            self.stats.discarded += 1
+                        raise
+                    # The server closed the idle socket; retry once on a fresh one.
+                    logging.debug(f"Stale pooled connection to {self.host}, reconnecting: {e!r}")
+                    conn.close()
+                    with self._lock:
+                        self.stats.reconnected_stale += 1
+                    conn, reused = self._new_connection(), False
+                    continue
+                except BaseException:
+                    conn.close()
+                    with self._lock:
+                        self.stats.discarded += 1
+                    raise
+                self._checkin(conn, reusable=not res.will_close)
+                return PooledResponse(res.status, res.reason, res.msg, data)
+        finally:
+            self._slots.release()
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def close(self) -> None:
+        """
+        Close every idle connection and refuse further checkouts.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from chunking import estimate_tokens
+
+
+@dataclass
+class Turn:
+    """
+    One message of the conversation. Once `summary` is set, turns larger than the manager's
+    `compact_above_tokens` are sent as the summary instead of the raw content.
+    """
+    role: str
+    content: str
+    summary: Optional[str] = None
+    pinned: bool = False
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.content)
+
+
+@dataclass
+class PromptReport:
+    """
+    Size of one rendered prompt. `prefix_tokens` is the part identical to the previous prompt,
+    i.e. what a server-side prompt cache can reuse.
+    """
+    turn: int
+    prompt_tokens: int
+    prefix_tokens: int
+    raw_tokens: int
+    compacted_turns: int
+    dropped_turns: int
+
+    def describe(self) -> str:
+        return (f"turn {self.turn}: ~{self.prompt_tokens} prompt tokens "
+                f"(~{self.prefix_tokens} shared with the previous prompt, ~{self.raw_tokens} uncompacted; "
+                f"{self.compacted_turns} turns summarized, {self.dropped_turns} dropped)")
+
+
+class ConversationManager:
+    """
+    Keeps a multi-turn chat within a rolling token budget. Large turns are replaced by their
+    summaries once they have one, and if the prompt is still over `max_prompt_tokens` the
+    oldest unpinned exchanges are dropped. The system message and pinned turns always come
+    first and never change after compaction, so the prompt keeps a stable prefix that
+    server-side prompt caching can reuse.
+    """
+
+    def __init__(self, system_prompt: str, max_prompt_tokens: int = 4000, compact_above_tokens: int = 200):
+        self.system_prompt = system_prompt
+        self.max_prompt_tokens = max_prompt_tokens
+        self.compact_above_tokens = compact_above_tokens
+        self.turns: List[Turn] = []
+        self.dropped = 0
+        self.reports: List[PromptReport] = []
+        self._last_messages: List[dict] = []
+
+    def add(self, role: str, content: str, summary: Optional[str] = None, pinned: bool = False) -> Turn:
+        """
+        Append a turn and return it, for a later `summarize`.
+        """
+        turn = Turn(role, content, summary, pinned)
+        self.turns.append(turn)
+        return turn
+
+    def summarize(self, turn: Turn, summary: str) -> None:
+        """
+        Record the summary of an earlier turn; it is sent instead of the turn from now on.
+        """
+        turn.summary = summary
+
+    def _compacted(self, turn: Turn) -> bool:
+        return turn.summary is not None and turn.tokens > self.compact_above_tokens
+
+    def _render(self, turn: Turn) -> dict:
+        return {"role": turn.role, "content": turn.summary if self._compacted(turn) else turn.content}
+
+    def _enforce_budget(self) -> None:
+        """
+        Drop the oldest unpinned turns until the prompt fits, never the latest turn. An assistant
+        turn left leading the unpinned history is dropped along with the user turn it answered.
+        """
+        def total() -> int:
+            return estimate_tokens(self.system_prompt) + sum(
+                estimate_tokens(self._render(turn)["content"]) for turn in self.turns)
+
+        while total() > self.max_prompt_tokens:
+            candidates = [i for i, turn in enumerate(self.turns[:-1]) if not turn.pinned]
+            if not candidates:
+                return
+            del self.turns[candidates[0]]
+            self.dropped += 1
+            rest = [i for i, turn in enumerate(self.turns[:-1]) if not turn.pinned]
+            if rest and self.turns[rest[0]].role == "assistant":
+                del self.turns[rest[0]]
+                self.dropped += 1
+
+    def messages(self) -> List[dict]:
+        """
+        The prompt to send for the next completion. Each call is recorded in `reports`.
+        """
+        self._enforce_budget()
+        messages = [{"role": "system", "content": self.system_prompt}]
+        messages.extend(self._render(turn) for turn in self.turns)
+
+        prefix_tokens = 0
+        for previous, current in zip(self._last_messages, messages):
+            if previous != current:
+                break
+            prefix_tokens += estimate_tokens(current["content"])
+        self._last_messages = messages
+        self.reports.append(PromptReport(
+            turn=len(self.reports) + 1,
+            prompt_tokens=sum(estimate_tokens(message["content"]) for message in messages),
+            prefix_tokens=prefix_tokens,
+            raw_tokens=estimate_tokens(self.system_prompt) + sum(turn.tokens for turn in self.turns),
+            compacted_turns=sum(1 for turn in self.turns if self._compacted(turn)),
+            dropped_turns=self.dropped,
+        ))
+        return messages
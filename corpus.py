@@ -0,0 +1,157 @@
+import codecs
+import json
+import mmap
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from cache import content_hash
+
+DATA_FILE = "corpus.dat"
+INDEX_FILE = "corpus.idx"
+
+
+@dataclass
+class DocumentRecord:
+    """
+    Index entry for one stored document: where its UTF-8 text lives in the data file.
+    """
+    doc_id: int
+    url: str
+    hash: str
+    offset: int
+    length: int
+    fetched_at: float
+
+
+class Corpus:
+    """
+    Append-only document store in a directory: texts are appended to `corpus.dat` and an
+    offset index (one JSON line per document) to `corpus.idx`. Reads go through a memory map
+    of the data file, so documents can be streamed one at a time without loading the corpus.
+    A document is only visible once its index line is written, so a write interrupted
+    half-way leaves unreferenced bytes behind rather than a corrupt entry.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.data_path = os.path.join(directory, DATA_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.records: List[DocumentRecord] = []
+        self._by_hash: Dict[str, int] = {}
+        self._by_url: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._map: Optional[mmap.mmap] = None
+        self._data = open(self.data_path, "ab+")
+        self._index = open(self.index_path, "a+", encoding="utf-8")
+        self._load_index()
+
+    def _load_index(self) -> None:
+        data_size = os.path.getsize(self.data_path)
+        self._index.seek(0)
+        line = ""
+        for line in self._index:
+            try:
+                record = DocumentRecord(**json.loads(line))
+            except (ValueError, TypeError):
+                continue
+            if record.offset + record.length > data_size:
+                continue
+            self._add_record(record)
+        if line and not line.endswith("\n"):
+            # Terminate a line cut short by an interrupted write, so the next entry parses.
+            self._index.write("\n")
+            self._index.flush()
+
+    def _add_record(self, record: DocumentRecord) -> None:
+        record.doc_id = len(self.records)
+        self.records.append(record)
+        self._by_hash.setdefault(record.hash, record.doc_id)
+        self._by_url[record.url] = record.doc_id
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def has_hash(self, text_hash: str) -> bool:
+        return text_hash in self._by_hash
+
+    def has_url(self, url: str) -> bool:
+        return url in self._by_url
+
+    def append(self, url: str, text: str, text_hash: Optional[str] = None) -> Optional[DocumentRecord]:
+        """
+        Store `text` for `url` and return its record, or None if identical text is already stored.
+        """
+        text_hash = text_hash or content_hash(text)
+        body = text.encode("utf-8")
+        with self._lock:
+            if text_hash in self._by_hash:
+                return None
+            self._data.seek(0, os.SEEK_END)
+            offset = self._data.tell()
+            self._data.write(body)
+            self._data.flush()
+            record = DocumentRecord(len(self.records), url, text_hash, offset, len(body), time.time())
+            self._index.write(json.dumps(asdict(record), separators=(",", ":")) + "\n")
+            self._index.flush()
+            self._add_record(record)
+            return record
+
+    def _slice(self, start: int, end: int) -> bytes:
+        """
+        Bytes [start, end) of the data file, read through a memory map that is remapped after appends.
+        """
+        with self._lock:
+            if self._map is None or len(self._map) < end:
+                if self._map is not None:
+                    self._map.close()
+                self._map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map[start:end]
+
+    def read(self, doc_id: int) -> str:
+        record = self.records[doc_id]
+        if not record.length:
+            return ""
+        return self._slice(record.offset, record.offset + record.length).decode("utf-8")
+
+    def stream(self, doc_id: int, chunk_bytes: int = 64 * 1024) -> Iterator[str]:
+        """
+        Yield one document's text in pieces of about `chunk_bytes`, for documents too large to hold at once.
+        """
+        record = self.records[doc_id]
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        end = record.offset + record.length
+        for start in range(record.offset, end, chunk_bytes):
+            piece = decoder.decode(self._slice(start, min(start + chunk_bytes, end)))
+            if piece:
+                yield piece
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def iter_documents(self) -> Iterator[Tuple[DocumentRecord, str]]:
+        """
+        Yield (record, text) for every document in insertion order, one document in memory at a time.
+        """
+        for record in list(self.records):
+            yield record, self.read(record.doc_id)
+
+    def size_bytes(self) -> int:
+        return os.path.getsize(self.data_path)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self) -> "Corpus":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
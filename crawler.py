@@ -0,0 +1,279 @@
+"""
+Crawl a documentation site from a seed URL into an on-disk corpus (see corpus.py).
+
+Pages are fetched over a pooled requests session (through the HTTP cache), restricted to the
+seed's host and path, de-duplicated by normalized URL and by content hash, and appended to the
+corpus as extracted text. With --summarize, the stored pages are then streamed one at a time into a
+SummaryAgent.
+
+Usage: python crawler.py [SEED_URL] [--corpus DIR] [--max-pages 50] [--concurrency 4] [--summarize]
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import posixpath
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from cache import content_hash
+from corpus import Corpus
+from html_extract import DEFAULT_MAX_BYTES, ExtractionStats, extract_text_from_stream
+
+DEFAULT_SEED = "https://documentation-using-ai-agent.readthedocs.io/en/latest/"
+
+# Links to these are assets or downloads, not pages.
+SKIP_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp", ".css", ".js", ".json", ".xml",
+    ".pdf", ".zip", ".gz", ".tar", ".epub", ".woff", ".woff2", ".ttf", ".mp4", ".txt",
+}
+TRACKING_PARAM_RE = re.compile(r"^(utm_\w+|fbclid|gclid|ref)$")
+
+
+def remove_dot_segments(path: str) -> str:
+    """
+    Resolve "." and ".." segments of an absolute path ("/a/./b/../c" -> "/a/c").
+    """
+    segments = path.split("/")
+    resolved: List[str] = []
+    for position, segment in enumerate(segments):
+        last = position == len(segments) - 1
+        if segment in (".", ".."):
+            if segment == ".." and len(resolved) > 1:
+                resolved.pop()
+            if last:
+                resolved.append("")
+            continue
+        resolved.append(segment)
+    return "/".join(resolved) or "/"
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Canonical form of `url` (resolved against `base`) so one page has one key: lowercase scheme
+    and host, default port, fragment and tracking parameters dropped, query sorted, and
+    ".../index.html" folded into ".../". Returns None for non-HTTP links.
+    """
+    url = urljoin(base, url) if base else url
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    netloc = parts.hostname.lower()
+    if parts.port and parts.port != {"http": 80, "https": 443}[parts.scheme]:
+        netloc += f":{parts.port}"
+    path = remove_dot_segments(parts.path or "/")
+    if path.endswith("/index.html"):
+        path = path[:-len("index.html")]
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not TRACKING_PARAM_RE.match(key)))
+    return urlunsplit((parts.scheme, netloc, path, query, ""))
+
+
+@dataclass
+class CrawlStats:
+    """
+    Outcome of one crawl. `duplicates` were fetched but had the same text as a stored page;
+    `already_stored` were fetched (for their links) but their URL is already in the corpus;
+    `empty` were fetched but no text could be extracted from them.
+    """
+    pages_fetched: int = 0
+    pages_stored: int = 0
+    duplicates: int = 0
+    already_stored: int = 0
+    empty: int = 0
+    failed: int = 0
+    links_seen: int = 0
+    bytes_stored: int = 0
+    elapsed: float = 0.0
+
+    def as_dict(self) -> dict:
+        stats = asdict(self)
+        stats["pages_per_sec"] = round(self.pages_fetched / self.elapsed, 2) if self.elapsed else 0.0
+        return stats
+
+
+def fetch_html(url: str, session, cache=None, max_bytes: int = DEFAULT_MAX_BYTES) -> Optional[Tuple[str, str]]:
+    """
+    GET one page's raw body (at most `max_bytes`), revalidating a cached copy with a conditional
+    GET. Uses the same "raw" cache entries as try.ContentFetcher. Returns (final URL after
+    redirects, body), or None on failure.
+    """
+    import requests
+    cached = cache.lookup(url, "raw") if cache is not None else None
+    if cached is not None and cached.is_fresh:
+        return url, cached.body
+    stats = ExtractionStats()
+    try:
+        headers = cached.conditional_headers() if cached is not None else {}
+        with session.get(url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 304 and cached is not None:
+                return url, cache.revalidated(cached, response.headers, "raw")
+            response.raise_for_status()
+            body = extract_text_from_stream(response.iter_content(chunk_size=16384), encoding=response.encoding or "utf-8",
+                                            max_bytes=max_bytes, is_html=False, stats=stats)
+            # A redirected page is cached under its final URL: a hit on the original URL could not
+            # tell the caller where the body came from, and its relative links depend on that.
+            if cache is not None and not stats.truncated and response.url == url:
+                cache.store(url, body, response.headers, "raw")
+            return response.url, body
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Error fetching {url}: {e}")
+        return None
+
+
+def default_fetch(cache_dir: Optional[str] = None, concurrency: int = 4) -> Callable[[str], Optional[Tuple[str, str]]]:
+    """
+    Fetch raw HTML over one pooled requests session, through an HTTPCache in `cache_dir` if given.
+    try.py is not imported, so crawling needs no API key.
+    """
+    import requests
+    from http_cache import HTTPCache
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    cache = HTTPCache(cache_dir) if cache_dir else None
+    return lambda url: fetch_html(url, session, cache)
+
+
+class Crawler:
+    """
+    Breadth-first, same-site crawler. At most `concurrency` pages are fetched at once (on worker
+    threads, like AsyncContentFetcher) and at most `max_pages` in total. Only URLs on the seed's
+    host and under `scope` (by default the seed's directory) are followed. `fetch(url)` returns
+    (final URL after redirects, HTML) or None; links are resolved against the final URL.
+    """
+
+    def __init__(self, seed: str, corpus: Corpus, fetch: Callable[[str], Optional[Tuple[str, str]]],
+                 max_pages: int = 50, concurrency: int = 4, scope: Optional[str] = None):
+        self.seed = normalize_url(seed)
+        if self.seed is None:
+            raise ValueError(f"Not an HTTP(S) URL: {seed}")
+        seed_parts = urlsplit(self.seed)
+        self.netloc = seed_parts.netloc
+        self.scope = scope if scope is not None else seed_parts.path[:seed_parts.path.rfind("/") + 1]
+        self.corpus = corpus
+        self.fetch = fetch
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.stats = CrawlStats()
+
+    def in_scope(self, url: str) -> bool:
+        parts = urlsplit(url)
+        extension = posixpath.splitext(parts.path)[1].lower()
+        return parts.netloc == self.netloc and parts.path.startswith(self.scope) and extension not in SKIP_EXTENSIONS
+
+    async def _visit(self, url: str) -> Tuple[Optional[str], List[str]]:
+        """
+        Fetch one page, store its text unless its URL or identical text is already stored, and
+        return (its final URL, its links). A page that fails for any reason is counted and
+        logged without stopping the crawl.
+        """
+        try:
+            fetched = await asyncio.to_thread(self.fetch, url)
+            if fetched is None:
+                self.stats.failed += 1
+                return None, []
+            final_url, html = fetched
+            final_url = normalize_url(final_url) or url
+            self.stats.pages_fetched += 1
+            links: List[str] = []
+            text = extract_text_from_stream([html], links=links)
+            if self.corpus.has_url(final_url):
+                # Stored by an earlier crawl; still fetched (through the HTTP cache) for its links.
+                self.stats.already_stored += 1
+            elif not text:
+                self.stats.empty += 1
+                logging.warning(f"No text extracted from {final_url}; not stored.")
+            else:
+                record = self.corpus.append(final_url, text, content_hash(text))
+                if record is None:
+                    self.stats.duplicates += 1
+                else:
+                    self.stats.pages_stored += 1
+                    self.stats.bytes_stored += record.length
+            self.stats.links_seen += len(links)
+            return final_url, [normalized for normalized in (normalize_url(link, final_url) for link in links) if normalized]
+        except Exception as e:
+            logging.error(f"Error crawling {url}: {e}")
+            self.stats.failed += 1
+            return None, []
+
+    async def crawl_async(self) -> CrawlStats:
+        start = time.perf_counter()
+        seen = {self.seed}
+        frontier = deque([self.seed])
+        running = set()
+        started = 0
+        while frontier or running:
+            while frontier and len(running) < self.concurrency and started < self.max_pages:
+                running.add(asyncio.ensure_future(self._visit(frontier.popleft())))
+                started += 1
+            if not running:
+                break
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                final_url, links = task.result()
+                if final_url is not None:
+                    seen.add(final_url)
+                for link in links:
+                    if link not in seen and self.in_scope(link):
+                        seen.add(link)
+                        frontier.append(link)
+        self.stats.elapsed = time.perf_counter() - start
+        logging.info(f"Crawled {self.stats.pages_fetched} pages from {self.seed}; "
+                     f"{self.stats.pages_stored} stored, {self.stats.already_stored} already stored, "
+                     f"{self.stats.duplicates} duplicates, {self.stats.empty} empty, "
+                     f"{self.stats.failed} failed.")
+        return self.stats
+
+    def crawl(self) -> CrawlStats:
+        return asyncio.run(self.crawl_async())
+
+
+def summarize_corpus(corpus: Corpus, summary_agent, map_reduce_threshold: int = 3000):
+    """
+    Yield (url, summary) for every stored page, reading one document from the corpus at a time.
+    """
+    from chunking import estimate_tokens
+    for record, text in corpus.iter_documents():
+        if estimate_tokens(text) > map_reduce_threshold:
+            summary = summary_agent.summarize_map_reduce(text, chunk_tokens=map_reduce_threshold)
+        else:
+            summary = summary_agent.summarize(text)
+        yield record.url, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a documentation site into an on-disk corpus.")
+    parser.add_argument("seed", nargs="?", default=DEFAULT_SEED)
+    parser.add_argument("--corpus", default=os.getenv("CORPUS_DIR", ".corpus"), help="Corpus directory")
+    parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--scope", help="Only follow paths under this prefix (default: the seed's directory)")
+    parser.add_argument("--summarize", action="store_true", help="Summarize every stored page after crawling")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+    with Corpus(args.corpus) as corpus:
+        crawler = Crawler(args.seed, corpus, default_fetch(os.getenv("HTTP_CACHE_DIR", ".http_cache"), args.concurrency),
+                          max_pages=args.max_pages, concurrency=args.concurrency, scope=args.scope)
+        stats = crawler.crawl()
+        print(json.dumps(dict(stats.as_dict(), corpus_documents=len(corpus), corpus_bytes=corpus.size_bytes()), indent=4))
+
+        if args.summarize:
+            try_module = importlib.import_module("try")
+            summary_agent = try_module.SummaryAgent(try_module.GROC_API_KEY, try_module.CrewAIAgent(),
+                                                    router=try_module.build_summary_router())
+            for url, summary in summarize_corpus(corpus, summary_agent, try_module.MAP_REDUCE_THRESHOLD_TOKENS):
+                print(f"\n{url}:\n{summary or 'Failed to summarize this page.'}")
+
+
+if __name__ == "__main__":
+    main()
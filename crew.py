@@ -1,12 +1,18 @@
-from crewai import LLM, Agent, Task, Crew
 import warnings
 from dotenv import load_dotenv
-import re
-import http.client
 import json
-from datetime import datetime
-from IPython.display import Markdown
 import os
+import argparse
+from functools import lru_cache
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+from query_parser import normalize_inputs, parse_user_input, resolve_date
+from event_context import serialize_event_records, serialize_events, token_comparison
+from tracing import tracer
+from chunking import estimate_tokens
+
+# crewai, IPython, the HasData client and the batch runner are imported where they are
+# first used, so importing this module (and short-lived CLI runs) stays cheap.
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
@@ -14,147 +20,296 @@ warnings.filterwarnings('ignore')
 # Load environment variables
 load_dotenv()
 
-# Securely retrieve API key from .env file
-API_KEY = os.getenv("HASDATA_API_KEY")
-if not API_KEY:
-    raise ValueError("API Key not found. Please set HASDATA_API_KEY in your .env file.")
-
-# Initialize LLM
-llm = LLM(
-    model="openai/gpt-4",
-    temperature=0.7
-)
-
-# Event Planner Agent
-planner = Agent(
-    role="Event Planner",
-    goal="Identify events based on location, date, preferences, and specific event names or programs.",
-    backstory="You're tasked with finding events in the user's area "
-              "that match their preferences, timing, and optionally a specific event or program.",
-    allow_delegation=False,
-    llm=llm,
-    verbose=True
-)
-
-# Weather Forecaster Agent
-forecaster = Agent(
-    role="Weather Forecaster",
-    goal="Provide accurate weather forecasts for specific locations and dates.",
-    backstory="You're responsible for checking weather conditions for the events "
-              "suggested by the Event Planner.",
-    allow_delegation=False,
-    llm=llm,
-    verbose=True
-)
-
-# Activity Recommender Agent
-recommender = Agent(
-    role="Activity Recommender",
-    goal="Suggest activities or events combining user preferences, weather data, and specific interests.",
-    backstory="You work with the Event Planner and Weather Forecaster "
-              "to recommend the best options to the user.",
-    allow_delegation=False,
-    llm=llm,
-    verbose=True
-)
-
-# Define tasks
-event_task = Task(
-    description=(
-        "Find events based on the following inputs:\n"
-        "- Location: {location}\n"
-        "- Date: {date}\n"
-        "- Preferences: {preferences}\n"
-        "- Event Name: {event_name}\n"
-        "Return a list of events matching these inputs."
-    ),
-    expected_output="A list of events with details (name, location, date, type, relevance to user input).",
-    agent=planner
-)
-
-weather_task = Task(
-    description=(
-        "Fetch weather conditions for the following:\n"
-        "- Location: {location}\n"
-        "- Date: {date}\n"
-        "Return weather data (temperature, conditions, suitability for outdoor activities)."
-    ),
-    expected_output="Weather forecast data for the specified location and date.",
-    agent=forecaster
-)
-
-recommendation_task = Task(
-    description=(
-        "Based on event details, weather data, and user inputs, provide activity recommendations:\n"
-        "- Suggest events matching the user's interest in a specific program or event name.\n"
-        "- Suggest alternatives if the exact match is unavailable.\n"
-        "- Include options suitable for the weather.\n"
-    ),
-    expected_output="A list of tailored event recommendations for the user, prioritized by interest.",
-    agent=recommender
-)
-
-crew = Crew(
-    agents=[planner, forecaster, recommender],
-    tasks=[event_task, weather_task, recommendation_task],
-    verbose=True
-)
-
-# Function to parse user input
-def parse_user_input(user_input):
-    location_pattern = r"in\s([a-zA-Z\s]+)"
-    date_pattern = r"(this weekend|tomorrow|next week|today|\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4})"
-    preferences_pattern = r"(outdoor|indoor|family-friendly|music|sports|adventure)"
-    event_name_pattern = r"about\s([a-zA-Z\s]+)"
-
-    location_match = re.search(location_pattern, user_input)
-    location = location_match.group(1).strip() if location_match else None
-
-    date_match = re.search(date_pattern, user_input)
-    date_raw = date_match.group(0).strip() if date_match else None
-    date = None
-    if date_raw:
-        try:
-            if "-" in date_raw or "/" in date_raw:
-                date = datetime.strptime(date_raw, "%Y-%m-%d").strftime("%Y-%m-%d") if "-" in date_raw else datetime.strptime(date_raw, "%d/%m/%Y").strftime("%Y-%m-%d")
-            else:
-                date = date_raw
-        except ValueError:
-            print(f"Error: Invalid date format '{date_raw}'. Please use YYYY-MM-DD or DD/MM/YYYY.")
-
-    preferences_matches = re.findall(preferences_pattern, user_input)
-    preferences = ", ".join(preferences_matches) if preferences_matches else None
-
-    event_name_match = re.search(event_name_pattern, user_input)
-    event_name = event_name_match.group(1).strip() if event_name_match else None
-
-    return {
-        "location": location,
-        "date": date,
-        "preferences": preferences,
-        "event_name": event_name
-    }
-
-# Function to fetch events from API
-def fetch_events(location, date, preferences, event_name):
-    conn = http.client.HTTPSConnection("api.hasdata.com")
-    query = f"Events+in+{location.replace(' ', '+')}"
-    if event_name:
-        query += f"+{event_name.replace(' ', '+')}"
-
-    api_endpoint = f"/scrape/google/events?q={query}"
-    headers = {
-        'x-api-key': API_KEY,  # Use API key from environment
-        'Content-Type': "application/json"
-    }
-
-    try:
-        conn.request("GET", api_endpoint, headers=headers)
-        res = conn.getresponse()
-        data = res.read()
-        return json.loads(data.decode("utf-8"))
-    except Exception as e:
-        return {"error": str(e)}
+# Raised when the environment is missing required settings (a server problem, not a bad query)
+class ConfigurationError(Exception):
+    pass
+
+# Securely retrieve API key from .env file; checked when events are first fetched
+def get_api_key():
+    api_key = os.getenv("HASDATA_API_KEY")
+    if not api_key:
+        raise ConfigurationError("API Key not found. Please set HASDATA_API_KEY in your .env file.")
+    return api_key
+
+# Write a Chrome trace of each run to this file when set (open in chrome://tracing or ui.perfetto.dev)
+TRACE_FILE = os.getenv("CREW_TRACE_FILE")
+
+# litellm callback that records every LLM call the agents make as a trace span
+def llm_trace_callback():
+    from litellm.integrations.custom_logger import CustomLogger
+
+    class TraceLLMCalls(CustomLogger):
+        def log_success_event(self, kwargs, response_obj, start_time, end_time):
+            usage = getattr(response_obj, "usage", None)
+            tracer.record(
+                "llm_call", start_time.timestamp(), end_time.timestamp(), category="llm",
+                model=kwargs.get("model"),
+                prompt_tokens=getattr(usage, "prompt_tokens", 0),
+                completion_tokens=getattr(usage, "completion_tokens", 0)
+            )
+
+        def log_failure_event(self, kwargs, response_obj, start_time, end_time):
+            tracer.record("llm_call", start_time.timestamp(), end_time.timestamp(), category="llm",
+                          model=kwargs.get("model"), error=str(kwargs.get("exception")))
+
+    return TraceLLMCalls()
+
+# Model cascade for the agents: each task runs on CREW_SMALL_MODEL first (when its inputs are at
+# most CREW_SMALL_MAX_INPUT_TOKENS) and is re-run on CREW_LARGE_MODEL if the output is empty,
+# malformed or hedged. CREW_MODEL_ROUTING=0 runs every task on the large model.
+CREW_SMALL_MODEL = os.getenv("CREW_SMALL_MODEL", "openai/gpt-4o-mini")
+CREW_LARGE_MODEL = os.getenv("CREW_LARGE_MODEL", "openai/gpt-4")
+CREW_SMALL_MAX_INPUT_TOKENS = int(os.getenv("CREW_SMALL_MAX_INPUT_TOKENS", "6000"))
+CREW_MODEL_ROUTING = os.getenv("CREW_MODEL_ROUTING", "1") == "1"
+# Tasks that skip the small model: the final recommendation weighs events and weather together
+CREW_LARGE_TASKS = [task.strip() for task in os.getenv("CREW_LARGE_TASKS", "recommendation_task").split(",") if task.strip()]
+
+# Function to get the LLM for a model (the large one by default)
+def get_llm(model=None):
+    return _build_llm(model or CREW_LARGE_MODEL)
+
+# Initialize each LLM once, on first use; keyed by model name, so get_llm() and
+# get_llm(CREW_LARGE_MODEL) share one instance
+@lru_cache(maxsize=None)
+def _build_llm(model):
+    from crewai import LLM
+    return LLM(
+        model=model,
+        temperature=0.7,
+        callbacks=[llm_trace_callback()]
+    )
+
+# Shared router, so per-model latency, token and escalation statistics cover every run
+@lru_cache(maxsize=None)
+def get_crew_router():
+    from routing import ModelRouter, ModelTier
+    return ModelRouter("crew", [
+        ModelTier(CREW_SMALL_MODEL, max_input_tokens=CREW_SMALL_MAX_INPUT_TOKENS),
+        ModelTier(CREW_LARGE_MODEL)
+    ], large_tasks=CREW_LARGE_TASKS)
+
+# Function to fetch events for parsed inputs
+def fetch_events_for(inputs):
+    from hasdata_client import fetch_events
+    with tracer.span("fetch_events", location=inputs["location"]) as span:
+        events = fetch_events(inputs["location"], inputs["date"], inputs["preferences"], inputs["event_name"], api_key=get_api_key())
+        span.set(bytes_in=len(json.dumps(events)), events=len(events.get("events", [])))
+    return events
+
+# Prompt budget (estimated tokens) for the fetched events injected into event_task
+EVENTS_CONTEXT_MAX_TOKENS = int(os.getenv("EVENTS_CONTEXT_MAX_TOKENS", "800"))
+
+# Function to add the compact, size-budgeted events the Event Planner ranks to the inputs;
+# returns the token comparison against the full API payload
+def attach_events_context(inputs, events):
+    with tracer.span("events_context", bytes_in=len(json.dumps(events))) as span:
+        inputs["events_context"] = serialize_events(events, max_tokens=EVENTS_CONTEXT_MAX_TOKENS)
+        comparison = token_comparison(events, inputs["events_context"])
+        span.set(bytes_out=len(inputs["events_context"]), **comparison)
+    return comparison
+
+# Ask the Weather Forecaster agent to phrase the looked-up forecast; off by default, since
+# the forecast itself comes from the weather provider and needs no LLM call
+WEATHER_LLM_PHRASING = os.getenv("WEATHER_LLM_PHRASING", "0") == "1"
+
+# Function to look up the forecast for the inputs from the (cached) weather provider
+def lookup_weather(inputs):
+    from weather import get_weather_service
+    with tracer.span("weather_lookup", location=inputs["location"]) as span:
+        report = get_weather_service().report(inputs["location"], inputs["date"])
+        span.set(bytes_out=len(report))
+    return report
+
+# Function to run one crew kickoff inside a trace span, recording its token usage
+def traced_kickoff(name, crew, inputs):
+    with tracer.span(name, category="task", bytes_out=len(json.dumps(inputs))) as span:
+        result = crew.kickoff(inputs=inputs)
+        usage = getattr(result, "token_usage", None)
+        span.set(
+            bytes_in=len(result.raw or ""),
+            prompt_tokens=getattr(usage, "prompt_tokens", 0),
+            completion_tokens=getattr(usage, "completion_tokens", 0)
+        )
+    return result
+
+# Function to run one kickoff on the cheapest suitable model, re-running it on the next model in
+# the cascade when the output is rejected. `agents` are switched to the model being tried; they
+# belong to this run (or this worker thread), so no other kickoff is using them meanwhile.
+def routed_kickoff(name, agents, make_crew, inputs):
+    if not CREW_MODEL_ROUTING:
+        return traced_kickoff(name, make_crew(), inputs)
+
+    def attempt(model):
+        for agent in agents:
+            agent.llm = get_llm(model)
+        return traced_kickoff(name, make_crew(), inputs)
+
+    return get_crew_router().run(name, estimate_tokens(json.dumps(inputs)), attempt, text=lambda result: result.raw)
+
+# Build the three agents. They can be reused by later runs in the same thread (see
+# service.py); the forecaster only exists when the forecast is phrased by the LLM.
+def build_agents(phrase_weather=WEATHER_LLM_PHRASING):
+    from crewai import Agent
+    llm = get_llm()
+
+    # Event Planner Agent
+    planner = Agent(
+        role="Event Planner",
+        goal="Identify events based on location, date, preferences, and specific event names or programs.",
+        backstory="You're tasked with finding events in the user's area "
+                  "that match their preferences, timing, and optionally a specific event or program.",
+        allow_delegation=False,
+        llm=llm,
+        verbose=True
+    )
+
+    # Weather Forecaster Agent
+    forecaster = Agent(
+        role="Weather Forecaster",
+        goal="Explain weather forecasts for specific locations and dates clearly.",
+        backstory="You're responsible for explaining the weather conditions for the events "
+                  "suggested by the Event Planner.",
+        allow_delegation=False,
+        llm=llm,
+        verbose=True
+    ) if phrase_weather else None
+
+    # Activity Recommender Agent
+    recommender = Agent(
+        role="Activity Recommender",
+        goal="Suggest activities or events combining user preferences, weather data, and specific interests.",
+        backstory="You work with the Event Planner and Weather Forecaster "
+                  "to recommend the best options to the user.",
+        allow_delegation=False,
+        llm=llm,
+        verbose=True
+    )
+
+    return SimpleNamespace(planner=planner, forecaster=forecaster, recommender=recommender)
+
+# Build a fresh set of tasks and crew around the given (or new) agents. Tasks keep per-run
+# state (interpolated descriptions, outputs), so concurrent runs must not share them.
+def build_pipeline(agents=None):
+    from crewai import Task, Crew
+    agents = agents or build_agents()
+    planner, forecaster, recommender = agents.planner, agents.forecaster, agents.recommender
+
+    # Define tasks
+    event_task = Task(
+        description=(
+            "Rank the events below, fetched from the events API, against the following inputs:\n"
+            "- Location: {location}\n"
+            "- Date: {date}\n"
+            "- Preferences: {preferences}\n"
+            "- Event Name: {event_name}\n"
+            "Events (one JSON object per line):\n"
+            "{events_context}\n"
+            "Return a list of the events matching these inputs, best first. Only use the events listed above."
+        ),
+        expected_output="A list of events with details (name, location, date, type, relevance to user input).",
+        agent=planner
+    )
+
+    weather_task = Task(
+        description=(
+            "Explain this weather forecast for {location} ({date}) in a short paragraph:\n"
+            "{weather_report}\n"
+            "Cover temperature, conditions and suitability for outdoor activities. Do not add data."
+        ),
+        expected_output="A short, readable weather summary for the specified location and date.",
+        agent=forecaster
+    ) if forecaster is not None else None
+
+    recommendation_task = Task(
+        description=(
+            "Based on event details, weather data, and user inputs, provide activity recommendations:\n"
+            "- Suggest events matching the user's interest in a specific program or event name.\n"
+            "- Suggest alternatives if the exact match is unavailable.\n"
+            "- Include options suitable for the weather.\n"
+            "Weather forecast:\n"
+            "{weather_report}\n"
+        ),
+        expected_output="A list of tailored event recommendations for the user, prioritized by interest.",
+        agent=recommender,
+        context=[task for task in (event_task, weather_task) if task is not None]
+    )
+
+    crew = Crew(
+        agents=[agent for agent in (planner, forecaster, recommender) if agent is not None],
+        tasks=[task for task in (event_task, weather_task, recommendation_task) if task is not None],
+        verbose=True
+    )
+
+    return SimpleNamespace(
+        planner=planner,
+        forecaster=forecaster,
+        recommender=recommender,
+        event_task=event_task,
+        weather_task=weather_task,
+        recommendation_task=recommendation_task,
+        crew=crew
+    )
+
+# Run the event task and the weather lookup in parallel, then the recommendation task.
+# Set CREW_EXECUTION_MODE=sequential to run the tasks one after another instead.
+EXECUTION_MODE = os.getenv("CREW_EXECUTION_MODE", "dag")
+
+def run_pipeline_dag(inputs, pipeline):
+    from crewai import Crew
+    from scheduler import TaskGraph
+    p = pipeline
+    graph = TaskGraph()
+    # Each task runs in its own single-task crew; recommendation_task reads the upstream
+    # outputs through its `context` and the forecast through {weather_report}.
+    graph.add("event_task", lambda: routed_kickoff(
+        "event_task", [p.planner], lambda: Crew(agents=[p.planner], tasks=[p.event_task], verbose=True), inputs
+    ))
+    graph.add("weather_lookup", lambda: lookup_weather(inputs))
+    upstream = ("event_task", "weather_lookup")
+    if p.weather_task is not None:
+        graph.add(
+            "weather_task",
+            lambda weather_lookup: routed_kickoff(
+                "weather_task", [p.forecaster], lambda: Crew(agents=[p.forecaster], tasks=[p.weather_task], verbose=True),
+                dict(inputs, weather_report=weather_lookup)
+            ),
+            depends_on=("weather_lookup",)
+        )
+        upstream += ("weather_task",)
+    graph.add(
+        "recommendation_task",
+        lambda event_task, weather_lookup, **_: routed_kickoff(
+            "recommendation_task", [p.recommender],
+            lambda: Crew(agents=[p.recommender], tasks=[p.recommendation_task], verbose=True),
+            dict(inputs, weather_report=weather_lookup)
+        ),
+        depends_on=upstream
+    )
+    return graph.run(max_workers=2)
+
+# Run the tasks one after another, each in its own single-task crew and routed on its own, so
+# CREW_LARGE_TASKS applies and an escalation only re-runs the task whose output was rejected
+def run_pipeline_sequential(inputs, pipeline):
+    from crewai import Crew
+    p = pipeline
+    inputs = dict(inputs, weather_report=lookup_weather(inputs))
+    steps = [("event_task", p.planner, p.event_task), ("weather_task", p.forecaster, p.weather_task),
+             ("recommendation_task", p.recommender, p.recommendation_task)]
+    result = None
+    for name, agent, task in steps:
+        if task is None:
+            continue
+        result = routed_kickoff(name, [agent], lambda agent=agent, task=task: Crew(agents=[agent], tasks=[task], verbose=True),
+                                inputs)
+    return result
+
+# Function to run the crew workflow; returns the final output and the task timings (DAG mode only)
+def run_pipeline(inputs, agents=None):
+    pipeline = build_pipeline(agents)
+    if EXECUTION_MODE == "sequential":
+        return run_pipeline_sequential(inputs, pipeline), None
+    run = run_pipeline_dag(inputs, pipeline)
+    return run.results["recommendation_task"], run
 
 # Function to display events
 def display_events(events):
@@ -177,32 +332,222 @@ def display_events(events):
         print(f"Link: {event.get('link', 'N/A')}\n")
         print("-" * 50)
 
-# Main Program
-user_input = input("Tell me what you're looking for (e.g., 'I want to find outdoor family-friendly events in Dhaka on 2025-02-15 about music festivals'): ")
-
-# Parse user input
-inputs = parse_user_input(user_input)
-
-# Ensure location is provided
-if not inputs["location"]:
-    print("Error: Location is required. Please specify a location (e.g., 'in Dhaka').")
-else:
+# Function to parse a query and fill in defaults; returns None when no location was given
+def prepare_inputs(user_input):
+    with tracer.span("parse_user_input", bytes_in=len(user_input)):
+        inputs = parse_user_input(user_input)
+    if not inputs["location"]:
+        return None
     inputs["date"] = inputs["date"] or "today"
     inputs["preferences"] = inputs["preferences"] or "any"
     inputs["event_name"] = inputs["event_name"] or "general events"
+    return inputs
+
+# Whole-pipeline result cache. Results stay fresh for RESULT_CACHE_TTL seconds (never past the
+# end of the day they are about), then are served stale for up to RESULT_CACHE_STALE seconds
+# while they are recomputed in the background. RESULT_CACHE_PATH keeps them on disk;
+# RESULT_CACHE=0 turns the cache off.
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "1") == "1"
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "1800"))
+RESULT_CACHE_STALE = float(os.getenv("RESULT_CACHE_STALE", "600"))
+
+@lru_cache(maxsize=None)
+def get_result_cache():
+    from cache import RefreshingCache, SQLiteCache, TTLCache
+    path = os.getenv("RESULT_CACHE_PATH")
+    max_bytes = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    if path:
+        backend = SQLiteCache(path, max_bytes, RESULT_CACHE_TTL, stale_while_revalidate=RESULT_CACHE_STALE)
+    else:
+        backend = TTLCache(max_bytes, RESULT_CACHE_TTL, stale_while_revalidate=RESULT_CACHE_STALE)
+    return RefreshingCache(backend)
+
+# Function to build the result cache key: equivalent queries ("Dhaka today" asked on the same
+# day, different casing or preference order) share one entry
+def result_cache_key(inputs):
+    from cache import content_hash
+    return "recommendation:" + content_hash({
+        **normalize_inputs(inputs),
+        "phrase_weather": WEATHER_LLM_PHRASING,
+        "models": [CREW_SMALL_MODEL, CREW_LARGE_MODEL] if CREW_MODEL_ROUTING else [CREW_LARGE_MODEL],
+        "events_context_max_tokens": EVENTS_CONTEXT_MAX_TOKENS
+    })
+
+# Function to pick how long a result stays fresh: RESULT_CACHE_TTL, cut off at the end of the
+# last day the query covers
+def result_ttl(inputs, now=None):
+    now = now or datetime.now()
+    resolved = resolve_date(inputs["date"], now.date())
+    if resolved is None:
+        return RESULT_CACHE_TTL
+    end_of_range = datetime.combine(resolved[1] + timedelta(days=1), datetime.min.time())
+    remaining = (end_of_range - now).total_seconds()
+    return min(RESULT_CACHE_TTL, remaining) if remaining > 0 else RESULT_CACHE_TTL
+
+# Function to build the JSON record returned by `recommend` and kept in the result cache
+def recommendation_record(inputs, events_found, events_error, context_tokens, result):
+    return {
+        "inputs": {key: value for key, value in inputs.items() if key != "events_context"},
+        "events_found": events_found,
+        "events_error": events_error,
+        "events_context_tokens": context_tokens,
+        "recommendation": result.raw
+    }
+
+# Function to run the events fetch and the crew for prepared inputs
+def run_recommendation(inputs, agents=None):
+    inputs = dict(inputs)
+    events = fetch_events_for(inputs)
+    comparison = attach_events_context(inputs, events)
+    with tracer.span("pipeline"):
+        result, _ = run_pipeline(inputs, agents)
+    return recommendation_record(inputs, len(events.get("events", [])), events.get("error"),
+                                 comparison["compact_context_tokens"], result)
+
+# Function to process one query end to end without printing (used by batch and service mode).
+# Results come from the result cache when possible; failed event fetches are not cached.
+def recommend(user_input, agents=None):
+    inputs = prepare_inputs(user_input)
+    if inputs is None:
+        raise ValueError("Location is required. Please specify a location (e.g., 'in Dhaka').")
+    if not RESULT_CACHE_ENABLED:
+        return run_recommendation(inputs, agents)
+    with tracer.span("result_cache") as span:
+        computed = []
+
+        def compute():
+            computed.append(True)
+            return run_recommendation(inputs, agents)
+
+        result = get_result_cache().get_or_compute(
+            result_cache_key(inputs), compute, ttl=result_ttl(inputs),
+            cacheable=lambda record: not record["events_error"],
+            # Background refreshes build their own agents; `agents` belong to the calling thread.
+            refresh=lambda: run_recommendation(inputs)
+        )
+        span.set(hit=not computed)
+    return result
+
+# Most streamed events kept in memory for the planner's context; the prompt budget holds fewer
+EVENTS_CONTEXT_MAX_RECORDS = int(os.getenv("EVENTS_CONTEXT_MAX_RECORDS", "50"))
+
+# Function to stream the events for the inputs to `stream` as NDJSON, page by page, one compact
+# line per event with no full payload held or printed. The first EVENTS_CONTEXT_MAX_RECORDS
+# events become the planner's context. Returns (events found, API error or None).
+def stream_events_ndjson(inputs, stream):
+    from hasdata_client import PageStats, iter_events, write_ndjson
+    stats = PageStats()
+    records = []
+
+    def kept(events):
+        for event in events:
+            if len(records) < EVENTS_CONTEXT_MAX_RECORDS:
+                records.append(event)
+            yield event
+
+    with tracer.span("fetch_events", location=inputs["location"]) as span:
+        try:
+            write_ndjson(kept(iter_events(inputs["location"], inputs["date"], inputs["preferences"],
+                                          inputs["event_name"], api_key=get_api_key(), stats=stats)), stream)
+        except RuntimeError as e:
+            stats.error = str(e)
+        span.set(events=stats.events, pages=stats.pages)
+    if stats.error and not stats.events:
+        inputs["events_context"] = f"No events available (the events API failed: {stats.error})."
+    else:
+        inputs["events_context"] = serialize_event_records(records, total=stats.events,
+                                                           max_tokens=EVENTS_CONTEXT_MAX_TOKENS)
+    return stats.events, stats.error
+
+# Main Program
+def main(events_format="pretty"):
+    user_input = input("Tell me what you're looking for (e.g., 'I want to find outdoor family-friendly events in Dhaka on 2025-02-15 about music festivals'): ")
+
+    # Parse user input
+    inputs = prepare_inputs(user_input)
+
+    # Ensure location is provided
+    if inputs is None:
+        print("Error: Location is required. Please specify a location (e.g., 'in Dhaka').")
+        return
+
+    # Serve a fresh cached result if there is one (never stale: this process exits right away)
+    cache_key = result_cache_key(inputs) if RESULT_CACHE_ENABLED else None
+    cached = get_result_cache().cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        from IPython.display import Markdown
+        print("\nWorkflow Result (from the result cache):\n")
+        print(Markdown(cached["recommendation"]))
+        report_trace()
+        return
 
     # Fetch events
-    events = fetch_events(inputs["location"], inputs["date"], inputs["preferences"], inputs["event_name"])
-    display_events(events)
-    print("Fetched Events:")
-    print(json.dumps(events, indent=4))
+    if events_format == "ndjson":
+        import sys
+        events_found, events_error = stream_events_ndjson(inputs, sys.stdout)
+        if events_error:
+            print(f"Error: {events_error}")
+        context_tokens = estimate_tokens(inputs["events_context"])
+        print(f"\nEvents passed to the planner: ~{context_tokens} tokens ({events_found} events streamed)")
+    else:
+        events = fetch_events_for(inputs)
+        display_events(events)
+        print("Fetched Events:")
+        print(json.dumps(events, indent=4))
+        comparison = attach_events_context(inputs, events)
+        events_found, events_error = len(events.get("events", [])), events.get("error")
+        context_tokens = comparison["compact_context_tokens"]
+        print(f"\nEvents passed to the planner: ~{context_tokens} tokens "
+              f"(full payload ~{comparison['full_payload_tokens']} tokens, {comparison['reduction']:.0%} smaller)")
     # Execute the workflow
-    result = crew.kickoff(inputs=inputs)
+    with tracer.span("pipeline"):
+        result, run = run_pipeline(inputs)
+    if run is not None:
+        print("\nTask Timings:\n")
+        print(run.summary())
 
     # Display the result
+    from IPython.display import Markdown
     print("\nWorkflow Result:\n")
     print(Markdown(result.raw))
-
-
-
-
+    if cache_key and not events_error:
+        get_result_cache().cache.set(cache_key, recommendation_record(inputs, events_found, events_error,
+                                                                      context_tokens, result), result_ttl(inputs))
+    report_trace()
+
+# Function to print the per-stage summary and optionally write the Chrome trace file
+def report_trace():
+    print("\nStage Summary:\n")
+    print(tracer.summary_table())
+    if CREW_MODEL_ROUTING:
+        print("\nModel Routing:\n")
+        print(json.dumps(get_crew_router().stats(), indent=4))
+    if TRACE_FILE:
+        tracer.export_chrome_trace(TRACE_FILE)
+        print(f"\nTrace written to {TRACE_FILE}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find events and weather-aware activity recommendations.")
+    parser.add_argument("--batch", metavar="QUERIES", help="JSONL or CSV file of queries to process headlessly")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL file results are appended to in batch mode")
+    parser.add_argument("--concurrency", type=int, default=4, help="Queries processed at once in batch mode")
+    parser.add_argument("--no-resume", action="store_true", help="Redo queries already present in the output file")
+    parser.add_argument("--events-format", choices=("pretty", "ndjson"), default="pretty",
+                        help="How fetched events are printed: a readable listing plus the full payload, or one JSON line per event")
+    args = parser.parse_args()
+
+    if args.batch:
+        from batch import read_queries, run_batch_sync
+        from query_parser import parse_many
+        from weather import get_weather_service
+
+        # Warm the forecast cache for each chunk of queries still to run, one request per new city
+        def warm_forecasts(rows):
+            get_weather_service().prefetch(parsed["location"] for parsed in parse_many(row["query"] for row in rows))
+
+        stats = run_batch_sync(read_queries(args.batch), recommend, args.output, concurrency=args.concurrency,
+                               resume=not args.no_resume, prefetch=warm_forecasts)
+        print(json.dumps(stats.as_dict(), indent=4))
+        report_trace()
+    else:
+        main(args.events_format)
@@ -0,0 +1,110 @@
+import json
+from typing import Iterable, List, Optional
+
+from chunking import estimate_tokens
+
+# Prompt budget for the events given to the Event Planner, and how much of each description is kept.
+DEFAULT_MAX_TOKENS = 800
+DEFAULT_DESCRIPTION_CHARS = 160
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+def compact_event(event: dict, description_chars: int = DEFAULT_DESCRIPTION_CHARS) -> dict:
+    """
+    Keep only the fields used for ranking: title, when, where, venue, link and a shortened description.
+    """
+    compact = {"title": event.get("title")}
+    date = event.get("date")
+    if isinstance(date, dict):
+        compact["when"] = date.get("when") or date.get("startDate") or date.get("start_date")
+    elif date:
+        compact["when"] = date
+    address = event.get("address")
+    if address:
+        compact["where"] = ", ".join(address) if isinstance(address, list) else address
+    venue = event.get("venue")
+    if isinstance(venue, dict) and venue.get("name"):
+        compact["venue"] = venue["name"]
+    if event.get("link"):
+        compact["link"] = event["link"]
+    description = event.get("description")
+    if description and description_chars > 0:
+        compact["about"] = _shorten(description, description_chars)
+    return {key: value for key, value in compact.items() if value}
+
+
+def compact_record(event, description_chars: int = DEFAULT_DESCRIPTION_CHARS) -> dict:
+    """
+    `compact_event` for a hasdata_client.Event record, whose fields are already flattened.
+    """
+    compact = {"title": event.title, "when": event.when, "where": event.address, "venue": event.venue, "link": event.link}
+    if event.description and description_chars > 0:
+        compact["about"] = _shorten(event.description, description_chars)
+    return {key: value for key, value in compact.items() if value}
+
+
+def _budgeted_lines(compact_events: Iterable[dict], total: int, max_tokens: int) -> str:
+    """
+    One JSON line per compact event, stopping before the estimated token count exceeds
+    `max_tokens`, plus a note on how many of the `total` events were left out.
+    """
+    lines: List[str] = []
+    used = 0
+    for compact in compact_events:
+        line = json.dumps(compact, ensure_ascii=False, separators=(",", ":"))
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens and lines:
+            break
+        lines.append(line)
+        used += cost
+    omitted = total - len(lines)
+    if omitted:
+        lines.append(f"({omitted} more events omitted to fit the prompt budget)")
+    return "\n".join(lines)
+
+
+def serialize_events(events: dict, max_tokens: int = DEFAULT_MAX_TOKENS,
+                     description_chars: int = DEFAULT_DESCRIPTION_CHARS) -> str:
+    """
+    Serialize a `fetch_events` payload for a prompt: one compact JSON object per line, in API
+    order, stopping before the estimated token count exceeds `max_tokens`.
+    """
+    if "error" in events:
+        return f"No events available (the events API failed: {events['error']})."
+    event_list = events.get("events") or []
+    if not event_list:
+        return "No events were found for these inputs."
+    return _budgeted_lines((compact_event(event, description_chars) for event in event_list), len(event_list), max_tokens)
+
+
+def serialize_event_records(records: List, total: Optional[int] = None, max_tokens: int = DEFAULT_MAX_TOKENS,
+                            description_chars: int = DEFAULT_DESCRIPTION_CHARS) -> str:
+    """
+    Like `serialize_events`, for Event records from hasdata_client.iter_events. `records` may be
+    the first few of `total` streamed events; the rest are reported as omitted.
+    """
+    if not records:
+        return "No events were found for these inputs."
+    total = total if total is not None else len(records)
+    return _budgeted_lines((compact_record(record, description_chars) for record in records), total, max_tokens)
+
+
+def token_comparison(events: dict, context: Optional[str] = None, **kwargs) -> dict:
+    """
+    Estimated prompt tokens of the full pretty-printed payload versus the compact context.
+    """
+    context = context if context is not None else serialize_events(events, **kwargs)
+    full = estimate_tokens(json.dumps(events, indent=4))
+    compact = estimate_tokens(context)
+    return {
+        "events": len(events.get("events") or []),
+        "full_payload_tokens": full,
+        "compact_context_tokens": compact,
+        "reduction": round(1 - compact / full, 3) if full else 0.0,
+    }
@@ -0,0 +1,322 @@
+import http.client
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, TextIO
+
+from cache import SQLiteCache, TTLCache
+from connection_pool import HTTPSConnectionPool
+from resilience import Resilience, RetryableError, check_status
+from singleflight import SingleFlight
+
+HASDATA_HOST = "api.hasdata.com"
+
+# Google Events results come in pages of this many events.
+EVENTS_PAGE_SIZE = 10
+
+_pool: Optional[HTTPSConnectionPool] = None
+_pool_lock = threading.Lock()
+_cache = None
+_cache_configured = False
+
+# Shared retry / rate-limit / circuit-breaker policy for every HasData call.
+# HASDATA_RATE_LIMIT is requests per second allowed by our API quota.
+resilience = Resilience(
+    "hasdata",
+    rate=float(os.getenv("HASDATA_RATE_LIMIT", "5")),
+    burst=float(os.getenv("HASDATA_RATE_BURST", "10")),
+    max_attempts=int(os.getenv("HASDATA_MAX_ATTEMPTS", "4")),
+)
+
+# Concurrent identical searches share one upstream request.
+in_flight = SingleFlight("hasdata")
+
+
+def configure_pool(host: str = HASDATA_HOST, port: Optional[int] = None, max_size: Optional[int] = None,
+                   idle_timeout: Optional[float] = None, context=None) -> HTTPSConnectionPool:
+    """
+    Replace the shared HasData connection pool.
+    Pool size and idle timeout default to HASDATA_POOL_SIZE / HASDATA_POOL_IDLE_TIMEOUT.
+    """
+    global _pool
+    if max_size is None:
+        max_size = int(os.getenv("HASDATA_POOL_SIZE", "10"))
+    if idle_timeout is None:
+        idle_timeout = float(os.getenv("HASDATA_POOL_IDLE_TIMEOUT", "30"))
+    pool = HTTPSConnectionPool(host, port=port, max_size=max_size, idle_timeout=idle_timeout, context=context)
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    if previous is not None:
+        previous.close()
+    return pool
+
+
+def get_pool() -> HTTPSConnectionPool:
+    """
+    Return the shared HasData connection pool, creating it on first use.
+    """
+    with _pool_lock:
+        pool = _pool
+    return pool if pool is not None else configure_pool()
+
+
+def configure_cache(path: Optional[str] = None, max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+                    enabled: bool = True):
+    """
+    Replace the HasData response cache.
+    With a `path` (or HASDATA_CACHE_PATH) entries are kept in sqlite and survive restarts;
+    otherwise they live in memory. Pass enabled=False to turn caching off.
+    """
+    global _cache, _cache_configured
+    _cache_configured = True
+    if not enabled:
+        _cache = None
+        return None
+    path = path or os.getenv("HASDATA_CACHE_PATH")
+    if max_bytes is None:
+        max_bytes = int(os.getenv("HASDATA_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    if ttl is None:
+        ttl = float(os.getenv("HASDATA_CACHE_TTL", "900"))
+    if path:
+        _cache = SQLiteCache(path, max_bytes=max_bytes, default_ttl=ttl)
+    else:
+        _cache = TTLCache(max_bytes=max_bytes, default_ttl=ttl)
+    return _cache
+
+
+def get_cache():
+    """
+    Return the HasData response cache, creating the default one on first use.
+    """
+    return _cache if _cache_configured else configure_cache()
+
+
+def cache_stats() -> dict:
+    """
+    Hit/miss/eviction counters of the HasData response cache.
+    """
+    cache = _cache
+    return cache.stats.as_dict() if cache is not None else {}
+
+
+def events_cache_key(location, event_name) -> str:
+    """
+    Cache key for the query `fetch_events` builds: case- and whitespace-insensitive.
+    """
+    normalized_location = " ".join(location.split()).casefold()
+    normalized_event = " ".join((event_name or "").split()).casefold()
+    return f"events:{normalized_location}|{normalized_event}"
+
+
+def events_endpoint(location, event_name, start: int = 0) -> str:
+    """
+    Request path for one page of the events search; pages after the first are selected with `start`.
+    """
+    query = f"Events+in+{location.replace(' ', '+')}"
+    if event_name:
+        query += f"+{event_name.replace(' ', '+')}"
+    return f"/scrape/google/events?q={query}" + (f"&start={start}" if start else "")
+
+
+def _fetch_page(location, event_name, start, api_key, cache):
+    """
+    One page of search results as a payload dict, or {"error": ...}. Pages are cached and
+    coalesced per query and offset.
+    """
+    cache_key = events_cache_key(location, event_name) + (f"|start={start}" if start else "")
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    api_endpoint = events_endpoint(location, event_name, start)
+    headers = {
+        'x-api-key': api_key or os.getenv("HASDATA_API_KEY"),  # Use API key from environment
+        'Content-Type': "application/json"
+    }
+
+    def attempt():
+        try:
+            res = get_pool().request("GET", api_endpoint, headers=headers)
+        except (OSError, http.client.HTTPException) as e:
+            raise RetryableError(f"Connection to HasData failed: {e!r}") from e
+        check_status(res.status, res.headers)
+        return res
+
+    def fetch():
+        try:
+            res = resilience.call(attempt)
+            events = json.loads(res.data.decode("utf-8"))
+        except Exception as e:
+            return {"error": str(e)}
+        if cache is not None and res.status == 200 and "error" not in events:
+            cache.set(cache_key, events)
+        return events
+
+    # Keyed like the cache, so queries differing only in case or spacing coalesce too.
+    return in_flight.do((cache_key, headers['x-api-key']), fetch)
+
+
+# Function to fetch events from API
+def fetch_events(location, date, preferences, event_name, api_key=None, use_cache=True):
+    return _fetch_page(location, event_name, 0, api_key, get_cache() if use_cache else None)
+
+
+class Event:
+    """
+    Compact record of one search result holding only the fields we display or rank on.
+    `__slots__` keeps it far smaller than the nested API dict it is built from.
+    """
+    __slots__ = ("title", "when", "address", "venue", "description", "link", "thumbnail")
+
+    def __init__(self, title=None, when=None, address=None, venue=None, description=None, link=None, thumbnail=None):
+        self.title = title
+        self.when = when
+        self.address = address
+        self.venue = venue
+        self.description = description
+        self.link = link
+        self.thumbnail = thumbnail
+
+    @classmethod
+    def from_api(cls, event: dict) -> "Event":
+        date = event.get("date")
+        address = event.get("address")
+        venue = event.get("venue")
+        return cls(
+            title=event.get("title"),
+            when=(date.get("when") or date.get("startDate") or date.get("start_date")) if isinstance(date, dict) else date,
+            address=", ".join(address) if isinstance(address, list) else address,
+            venue=venue.get("name") if isinstance(venue, dict) else venue,
+            description=event.get("description"),
+            link=event.get("link"),
+            thumbnail=event.get("thumbnail"),
+        )
+
+    def as_dict(self) -> dict:
+        """
+        The non-empty fields, for JSON output.
+        """
+        return {name: getattr(self, name) for name in self.__slots__ if getattr(self, name)}
+
+    def __repr__(self) -> str:
+        return f"Event({self.title!r}, {self.when!r})"
+
+
+@dataclass
+class PageStats:
+    """
+    Progress of a paginated search, filled in while events are yielded. `requested` counts
+    page requests made (each a billed call unless cached), including ones ahead of a short page.
+    """
+    pages: int = 0
+    requested: int = 0
+    events: int = 0
+    duplicates: int = 0
+    error: Optional[str] = None
+    time_to_first_event: Optional[float] = None
+    elapsed: float = 0.0
+
+
+def iter_events(location, date, preferences, event_name, api_key=None, use_cache=True, max_pages: int = 5,
+                page_size: int = EVENTS_PAGE_SIZE, concurrency: int = 3,
+                stats: Optional[PageStats] = None) -> Iterator[Event]:
+    """
+    Yield events for a search across up to `max_pages` result pages, as compact Event records.
+    Page 0 is fetched alone, so a search whose first page is short costs one call. After that,
+    each full page lets one more page be requested ahead: the window grows by one page per full
+    page, up to `concurrency` pages in flight. Events are yielded in result order as soon
+    as their page (and every page before it) has arrived, and each page's payload is dropped once
+    converted. Pagination stops at the first short or failed page. Repeated events are skipped.
+    A failure on the first page raises RuntimeError with the API error; later failures end the
+    stream early with `stats.error` set.
+    """
+    stats = stats if stats is not None else PageStats()
+    concurrency = max(1, concurrency)
+    cache = get_cache() if use_cache else None
+    started = time.perf_counter()
+    seen = set()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = {}
+    next_page = 0
+    last_page = max_pages
+
+    def schedule(limit):
+        """
+        Request every page before `limit` not yet requested.
+        """
+        nonlocal next_page
+        while next_page < min(limit, last_page):
+            pending[next_page] = executor.submit(_fetch_page, location, event_name, next_page * page_size, api_key, cache)
+            next_page += 1
+            stats.requested += 1
+
+    try:
+        schedule(1)
+        page = 0
+        while page < last_page and page in pending:
+            payload = pending.pop(page).result()
+            if "error" in payload:
+                if page == 0:
+                    raise RuntimeError(payload["error"])
+                stats.error = payload["error"]
+                break
+            stats.pages += 1
+            results = payload.get("events") or []
+            del payload
+            if len(results) < page_size:
+                last_page = page + 1
+            else:
+                # A full page means the next one probably exists; look further ahead as full pages keep coming.
+                schedule(page + 1 + min(concurrency, page + 1))
+            for result in results:
+                event = Event.from_api(result)
+                identity = (event.title, event.when, event.address)
+                if identity in seen:
+                    stats.duplicates += 1
+                    continue
+                seen.add(identity)
+                if stats.time_to_first_event is None:
+                    stats.time_to_first_event = time.perf_counter() - started
+                stats.events += 1
+                yield event
+            page += 1
+    finally:
+        for future in pending.values():
+            future.cancel()
+        executor.shutdown(wait=False)
+        stats.elapsed = time.perf_counter() - started
+
+
+def write_ndjson(events: Iterable[Event], stream: TextIO) -> int:
+    """
+    Write one compact JSON object per event as it comes, instead of pretty-printing a whole
+    payload. Returns the number of events written.
+    """
+    count = 0
+    for event in events:
+        stream.write(json.dumps(event.as_dict(), ensure_ascii=False, separators=(",", ":")))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Stream HasData event search results as NDJSON.")
+    parser.add_argument("location")
+    parser.add_argument("--event-name")
+    parser.add_argument("--pages", type=int, default=5, help="Result pages to request at most")
+    parser.add_argument("--concurrency", type=int, default=3, help="Pages requested at once")
+    args = parser.parse_args()
+
+    page_stats = PageStats()
+    written = write_ndjson(iter_events(args.location, None, None, args.event_name, max_pages=args.pages,
+                                       concurrency=args.concurrency, stats=page_stats), sys.stdout)
+    print(f"{written} events from {page_stats.pages} pages in {page_stats.elapsed:.2f}s"
+          + (f" (stopped early: {page_stats.error})" if page_stats.error else ""), file=sys.stderr)
@@ -0,0 +1,169 @@
+import codecs
+import re
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Tuple, Union
+
+from chunking import estimate_tokens
+
+# Elements whose text is never page content.
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "head",
+    "nav", "header", "footer", "aside", "form", "button", "select", "option",
+}
+# Elements whose text is the page's main content when present.
+MAIN_TAGS = {"main", "article"}
+BLOCK_TAGS = {
+    "p", "div", "section", "br", "hr", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "figcaption", "main", "article",
+}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+# Whole class/id tokens marking boilerplate. Matched per token, not with \b, because theme classes
+# such as Read the Docs' "wy-nav-content" (the main-content wrapper) contain "nav" between hyphens.
+BOILERPLATE_CLASSES = {
+    "nav", "navbar", "menu", "sidebar", "breadcrumb", "breadcrumbs", "footer", "header", "cookie",
+    "banner", "toc", "wy-nav-side", "wy-nav-top", "wy-breadcrumbs", "rst-versions",
+}
+
+_SPACES_RE = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+
+@dataclass
+class ExtractionStats:
+    """
+    Size of a page before and after extraction, to see how much is saved per URL.
+    """
+    bytes_in: int = 0
+    chars_out: int = 0
+    tokens_out: int = 0
+    truncated: bool = False
+    elapsed: float = 0.0
+
+    @property
+    def reduction(self) -> float:
+        """
+        Fraction of the input size removed by extraction.
+        """
+        return 1 - self.chars_out / self.bytes_in if self.bytes_in else 0.0
+
+
+class StreamingTextExtractor(HTMLParser):
+    """
+    Incremental HTML-to-text converter. Feed it chunks as they arrive; markup, scripts and
+    navigation/boilerplate are dropped as it goes. If the page has a <main>, <article> or
+    role="main" element, only its text is returned, even when it sits inside an element that
+    looks like boilerplate. With a `links` list, the href of every
+    <a> element (navigation included) is appended to it as it is seen.
+    """
+
+    def __init__(self, links: Optional[List[str]] = None):
+        super().__init__(convert_charrefs=True)
+        self.links = links
+        # (tag, skip depth before the tag opened, whether the tag is a main-content element)
+        self._stack: List[Tuple[str, int, bool]] = []
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._all_parts: List[str] = []
+        self._main_parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._append("\n")
+        if tag in VOID_TAGS:
+            return
+        attributes = dict(attrs)
+        if tag == "a" and self.links is not None and attributes.get("href"):
+            self.links.append(attributes["href"])
+        tokens = f"{attributes.get('class') or ''} {attributes.get('id') or ''}".lower().split()
+        skip = tag in SKIP_TAGS or attributes.get("role") in ("navigation", "banner", "contentinfo") \
+            or attributes.get("aria-hidden") == "true" or not BOILERPLATE_CLASSES.isdisjoint(tokens)
+        main = tag in MAIN_TAGS or attributes.get("role") == "main" or attributes.get("itemprop") == "articleBody"
+        self._stack.append((tag, self._skip_depth, main))
+        # Main content is kept even inside a wrapper that looked like boilerplate.
+        self._skip_depth = 0 if main else self._skip_depth + skip
+        self._main_depth += main
+
+    def handle_endtag(self, tag):
+        # Browsers tolerate unclosed tags; pop back to the matching open tag if there is one.
+        if not any(open_tag == tag for open_tag, _, _ in self._stack):
+            return
+        while self._stack:
+            open_tag, skip_depth, main = self._stack.pop()
+            self._skip_depth = skip_depth
+            self._main_depth -= main
+            if open_tag == tag:
+                break
+        if tag in BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self._append(data)
+
+    def _append(self, text: str) -> None:
+        if self._skip_depth:
+            return
+        self._all_parts.append(text)
+        if self._main_depth:
+            self._main_parts.append(text)
+
+    def text(self) -> str:
+        """
+        The extracted text so far, with whitespace collapsed.
+        """
+        parts = self._main_parts if "".join(self._main_parts).strip() else self._all_parts
+        text = _SPACES_RE.sub(" ", "".join(parts))
+        text = "\n".join(line.strip() for line in text.split("\n"))
+        return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def extract_text_from_stream(chunks: Iterable[Union[bytes, str]], encoding: str = "utf-8",
+                             max_bytes: int = DEFAULT_MAX_BYTES, is_html: bool = True,
+                             stats: Optional[ExtractionStats] = None, links: Optional[List[str]] = None) -> str:
+    """
+    Consume an iterable of response chunks and return the page's main-content text.
+    Reading stops once `max_bytes` have been read, so memory stays bounded on huge pages.
+    Non-HTML bodies are passed through as text under the same cap. Pass a `links` list
+    to collect the page's link targets (raw hrefs) in the same pass.
+    """
+    stats = stats if stats is not None else ExtractionStats()
+    start = time.perf_counter()
+    decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    extractor = StreamingTextExtractor(links) if is_html else None
+    raw_parts: List[str] = []
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if isinstance(chunk, str):
+            chunk = chunk.encode(encoding or "utf-8")
+        remaining = max_bytes - stats.bytes_in
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            stats.truncated = True
+        stats.bytes_in += len(chunk)
+        text = decoder.decode(chunk)
+        if extractor is not None:
+            extractor.feed(text)
+        else:
+            raw_parts.append(text)
+        if stats.truncated:
+            break
+
+    tail = decoder.decode(b"", final=True)
+    if extractor is not None:
+        extractor.feed(tail)
+        extractor.close()
+        result = extractor.text()
+    else:
+        result = "".join(raw_parts) + tail
+
+    stats.chars_out = len(result)
+    stats.tokens_out = estimate_tokens(result)
+    stats.elapsed = time.perf_counter() - start
+    return result
@@ -0,0 +1,238 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Mapping, Optional, Set
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)")
+
+
+@dataclass
+class HTTPCacheStats:
+    """
+    How cached pages were served.
+    """
+    fresh_hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class CachedPage:
+    """
+    A stored body plus the validators and freshness lifetime it was served with.
+    """
+    url: str
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    max_age: Optional[float]
+    size: int
+    last_access: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.max_age is not None and time.time() - self.stored_at < self.max_age
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Headers that let the server answer 304 Not Modified if the page is unchanged.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def parse_cache_control(headers: Mapping[str, str]):
+    """
+    Return (storable, max_age) from a response's Cache-Control header.
+    `no-cache` is stored but always revalidated; `no-store` is not stored at all.
+    """
+    value = (headers.get("Cache-Control") or "").lower()
+    if "no-store" in value:
+        return False, None
+    if "no-cache" in value:
+        return True, 0.0
+    match = _MAX_AGE_RE.search(value)
+    return True, float(match.group(1)) if match else None
+
+
+class HTTPCache:
+    """
+    Persistent on-disk cache of fetched pages keyed by URL (and an optional variant, e.g.
+    extracted text vs raw HTML). Entries are served without a request while Cache-Control
+    max-age says they are fresh, then revalidated with If-None-Match/If-Modified-Since.
+    The directory is kept under `max_bytes` by evicting least recently used pages. Access
+    times are tracked in memory and written back by `flush()` (on eviction and at exit), so a
+    hit does not cost a disk write. Only complete bodies should be stored: the key does not
+    record any read limit.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 100 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = HTTPCacheStats()
+        self._lock = threading.Lock()
+        self._index: Dict[str, dict] = {}
+        # Keys whose last_access changed since their metadata file was written.
+        self._dirty: Set[str] = set()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+        atexit.register(self.flush)
+
+    def _key(self, url: str, variant: str) -> str:
+        return hashlib.sha256(f"{variant}|{url}".encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return base + ".json", base + ".body"
+
+    def _load_index(self) -> None:
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            self._index[name[:-len(".json")]] = meta
+        self.stats.bytes = sum(meta["size"] for meta in self._index.values())
+
+    def _write_meta(self, key: str, meta: dict) -> None:
+        meta_path, _ = self._paths(key)
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        self._dirty.discard(key)
+
+    def flush(self) -> None:
+        """
+        Write the access times recorded by lookups since the last flush to disk.
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        for key in list(self._dirty):
+            meta = self._index.get(key)
+            if meta is None:
+                self._dirty.discard(key)
+                continue
+            try:
+                self._write_meta(key, meta)
+            except OSError:
+                self._dirty.discard(key)
+
+    def lookup(self, url: str, variant: str = "") -> Optional[CachedPage]:
+        """
+        Return the stored page for `url`, fresh or not, or None if there is none.
+        """
+        key = self._key(url, variant)
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is None:
+                self.stats.misses += 1
+                return None
+            _, body_path = self._paths(key)
+            try:
+                with open(body_path, encoding="utf-8") as f:
+                    body = f.read()
+            except OSError:
+                self._remove(key)
+                self.stats.misses += 1
+                return None
+            meta["last_access"] = time.time()
+            self._dirty.add(key)
+            page = CachedPage(body=body, **meta)
+            if page.is_fresh:
+                self.stats.fresh_hits += 1
+            return page
+
+    def store(self, url: str, body: str, headers: Mapping[str, str], variant: str = "") -> None:
+        """
+        Save a 200 response body with its validators, unless Cache-Control forbids it.
+        """
+        storable, max_age = parse_cache_control(headers)
+        if not storable:
+            return
+        encoded = body.encode("utf-8")
+        if len(encoded) > self.max_bytes:
+            return
+        key = self._key(url, variant)
+        now = time.time()
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "stored_at": now,
+            "max_age": max_age,
+            "size": len(encoded),
+            "last_access": now,
+        }
+        with self._lock:
+            if key in self._index:
+                self._remove(key)
+            _, body_path = self._paths(key)
+            with open(body_path, "wb") as f:
+                f.write(encoded)
+            self._write_meta(key, meta)
+            self._index[key] = meta
+            self.stats.bytes += meta["size"]
+            self.stats.stores += 1
+            self._evict()
+
+    def revalidated(self, page: CachedPage, headers: Mapping[str, str], variant: str = "") -> str:
+        """
+        Record a 304 Not Modified for `page`: restart its freshness lifetime and keep any
+        updated validators. Returns the stored body.
+        """
+        key = self._key(page.url, variant)
+        _, max_age = parse_cache_control(headers)
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is not None:
+                meta["stored_at"] = time.time()
+                meta["max_age"] = max_age if max_age is not None else meta["max_age"]
+                meta["etag"] = headers.get("ETag") or meta["etag"]
+                meta["last_modified"] = headers.get("Last-Modified") or meta["last_modified"]
+                self._write_meta(key, meta)
+            self.stats.revalidated += 1
+        return page.body
+
+    def _remove(self, key: str) -> None:
+        self._dirty.discard(key)
+        meta = self._index.pop(key, None)
+        if meta is not None:
+            self.stats.bytes -= meta["size"]
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self) -> None:
+        if self.stats.bytes <= self.max_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_access"]):
+            if self.stats.bytes <= self.max_bytes:
+                break
+            self._remove(key)
+            self.stats.evictions += 1
+        # Persist the recency order the eviction was based on, for the next process.
+        self._flush()
@@ -1,6 +1,13 @@
 import requests
 from dotenv import load_dotenv
 import os
+import sys
+import json
+import time
+from html_extract import ExtractionStats, extract_text_from_stream
+from http_cache import HTTPCache
+from conversation import ConversationManager
+from retrieval import ChunkIndex
 
 # Load environment variables
 load_dotenv()
@@ -13,12 +20,40 @@ if not GROC_API_KEY:
 # Define Base URL for GROC API
 BASE_URL = "https://api.groq.com/openai/v1/chat/completions"
 
-# Function to fetch content from a URL
+# Local page cache; unchanged pages are served from disk after a conditional GET
+http_cache = HTTPCache(os.getenv("HTTP_CACHE_DIR", ".http_cache"))
+
+# Follow-up questions are answered from the RETRIEVAL_TOP_K most relevant chunks of the page,
+# found with a BM25 index saved under RETRIEVAL_INDEX_DIR
+RETRIEVAL_INDEX_DIR = os.getenv("RETRIEVAL_INDEX_DIR", ".retrieval_index")
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+
+# Rolling prompt budget for the multi-turn chat; older exchanges are dropped beyond it
+CONVERSATION_MAX_TOKENS = int(os.getenv("CONVERSATION_MAX_TOKENS", "4000"))
+
+# Function to fetch content from a URL, keeping only the page's main text
 def fetch_content_from_url(url):
+    cached = http_cache.lookup(url, "text")
+    if cached is not None and cached.is_fresh:
+        return cached.body
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise HTTPError for bad responses
-        return response.text
+        stats = ExtractionStats()
+        headers = cached.conditional_headers() if cached is not None else {}
+        with requests.get(url, headers=headers, stream=True) as response:
+            if response.status_code == 304 and cached is not None:
+                print("Content not modified; using cached copy.")
+                return http_cache.revalidated(cached, response.headers, "text")
+            response.raise_for_status()  # Raise HTTPError for bad responses
+            content = extract_text_from_stream(
+                response.iter_content(chunk_size=16384),
+                encoding=response.encoding or "utf-8",
+                is_html="html" in response.headers.get("Content-Type", "text/html"),
+                stats=stats,
+            )
+            if not stats.truncated:
+                http_cache.store(url, content, response.headers, "text")
+        print(f"Fetched {stats.bytes_in} bytes, extracted {stats.chars_out} chars (~{stats.tokens_out} tokens, {stats.reduction:.0%} smaller)")
+        return content
     except requests.exceptions.RequestException as e:
         print(f"Error fetching content from URL: {e}")
         return None
@@ -45,32 +80,98 @@ def groc_chat_completion(messages):
         print(f"Error interacting with GROC API: {e}")
         return None
 
+# Function to stream a GROC chat completion, yielding tokens as they arrive
+def groc_chat_completion_stream(messages):
+    headers = {
+        "Authorization": f"Bearer {GROC_API_KEY}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream",
+    }
+    payload = {
+        "model": "llama-3.3-70b-versatile",
+        "messages": messages,
+        "max_tokens": 300,
+        "temperature": 0.7,
+        "stream": True,
+    }
+    start = time.perf_counter()
+    first_token_at = None
+    tokens = 0
+    try:
+        with requests.post(BASE_URL, json=payload, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                token = (json.loads(data).get("choices") or [{}])[0].get("delta", {}).get("content")
+                if token:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter() - start
+                    tokens += 1
+                    yield token
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Error interacting with GROC API: {e}")
+        return
+    elapsed = time.perf_counter() - start
+    if first_token_at is not None:
+        generation_time = elapsed - first_token_at
+        rate = tokens / generation_time if generation_time > 0 else 0.0
+        print(f"\n[first token after {first_token_at:.2f}s, {tokens} tokens at {rate:.1f} tokens/sec]")
+
+# Function to print a streamed completion as it arrives and return the full text
+def print_streamed(messages):
+    text = ""
+    for token in groc_chat_completion_stream(messages):
+        text += token
+        print(token, end="", flush=True)
+    print()
+    return text or None
+
 # URL to fetch content from
 url = "https://documentation-using-ai-agent.readthedocs.io/en/latest/"
 
+# Follow-up questions asked one after another in the same conversation; extra ones come from the command line
+# (bench_conversation.py shows the prompt budget over many turns without API calls)
+questions = ["Based on the summary, what is the purpose of the documentation?"] + sys.argv[1:]
+
 # Fetch content from the URL
 content = fetch_content_from_url(url)
 if content:
-    # Prepare conversation messages
-    messages = [
-        {"role": "system", "content": "You are an AI assistant helping summarize and answer questions."},
-        {"role": "user", "content": f"Summarize the following content: {content}"},
-    ]
-    
-    # Step 1: Summarize content
-    summary = groc_chat_completion(messages)
+    # The conversation keeps a stable prefix and stays within CONVERSATION_MAX_TOKENS
+    conversation = ConversationManager(
+        "You are an AI assistant helping summarize and answer questions.",
+        max_prompt_tokens=CONVERSATION_MAX_TOKENS,
+    )
+    page_turn = conversation.add("user", f"Summarize the following content: {content}", pinned=True)
+
+    # Step 1: Summarize content, printing tokens as they arrive
+    print("\nSummary:")
+    summary = print_streamed(conversation.messages())
     if summary:
-        print("\nSummary:")
-        print(summary)
-
-        # Step 2: Answer a question based on the summary
-        messages.append({"role": "user", "content": f"Based on the summary, what is the purpose of the documentation?"})
-        answer = groc_chat_completion(messages)
-        if answer:
-            print("\nAnswer to the question:")
-            print(answer)
-        else:
-            print("Failed to get an answer from GROC API.")
+        # The summary now stands in for the raw page in every later prompt
+        conversation.summarize(page_turn, f"Summarize the documentation page at {url}.")
+        conversation.add("assistant", summary, pinned=True)
+        index = ChunkIndex.for_document(content, RETRIEVAL_INDEX_DIR)
+
+        # Step 2: Answer each question from the summary and only the page chunks relevant to it
+        for question in questions:
+            excerpts = index.context_for(question, k=RETRIEVAL_TOP_K)
+            question_turn = conversation.add("user", f"Relevant excerpts from the document:\n{excerpts}\n\nQuestion: {question}")
+            print(f"\nAnswer to: {question}")
+            answer = print_streamed(conversation.messages())
+            if not answer:
+                print("Failed to get an answer from GROC API.")
+                break
+            conversation.add("assistant", answer)
+            # The excerpts were only needed for this answer
+            conversation.summarize(question_turn, f"Question: {question}")
+
+        print("\nPrompt sizes:")
+        for report in conversation.reports:
+            print(f"  {report.describe()}")
     else:
         print("Failed to summarize content with GROC API.")
 else:
@@ -0,0 +1,116 @@
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Tuple
+
+# Patterns are compiled once at import instead of on every call.
+LOCATION_RE = re.compile(r"in\s([a-zA-Z\s]+)")
+DATE_RE = re.compile(r"this weekend|tomorrow|next week|today|(\d{4})-(\d{2})-(\d{2})|(\d{2})/(\d{2})/(\d{4})")
+PREFERENCES_RE = re.compile(r"outdoor|indoor|family-friendly|music|sports|adventure")
+EVENT_NAME_RE = re.compile(r"about\s([a-zA-Z\s]+)")
+
+
+@lru_cache(maxsize=4096)
+def _iso_date(year: str, month: str, day: str) -> Optional[str]:
+    """
+    Validate a numeric date already split by DATE_RE and format it as YYYY-MM-DD.
+    Returns None for impossible dates (e.g. 2025-02-30). Cached, since batches repeat dates.
+    """
+    try:
+        return date(int(year), int(month), int(day)).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _parse(user_input: str, location_search, date_search, preferences_findall, event_name_search) -> dict:
+    location_match = location_search(user_input)
+    location = location_match.group(1).strip() if location_match else None
+
+    date_value = None
+    date_match = date_search(user_input)
+    if date_match:
+        if date_match.group(1):
+            date_value = _iso_date(date_match.group(1), date_match.group(2), date_match.group(3))
+        elif date_match.group(4):
+            date_value = _iso_date(date_match.group(6), date_match.group(5), date_match.group(4))
+        else:
+            date_value = date_match.group(0)
+        if date_value is None:
+            print(f"Error: Invalid date format '{date_match.group(0)}'. Please use YYYY-MM-DD or DD/MM/YYYY.")
+
+    preferences_matches = preferences_findall(user_input)
+    preferences = ", ".join(preferences_matches) if preferences_matches else None
+
+    event_name_match = event_name_search(user_input)
+    event_name = event_name_match.group(1).strip() if event_name_match else None
+
+    return {
+        "location": location,
+        "date": date_value,
+        "preferences": preferences,
+        "event_name": event_name
+    }
+
+
+# Function to parse user input
+def parse_user_input(user_input: str) -> dict:
+    return _parse(user_input, LOCATION_RE.search, DATE_RE.search, PREFERENCES_RE.findall, EVENT_NAME_RE.search)
+
+
+def parse_many(user_inputs: Iterable[str]) -> Iterator[dict]:
+    """
+    Parse a stream of queries, yielding one dict per query in the same shape as `parse_user_input`.
+    Pattern method lookups are done once for the whole batch rather than once per query.
+    """
+    location_search = LOCATION_RE.search
+    date_search = DATE_RE.search
+    preferences_findall = PREFERENCES_RE.findall
+    event_name_search = EVENT_NAME_RE.search
+    for user_input in user_inputs:
+        yield _parse(user_input, location_search, date_search, preferences_findall, event_name_search)
+
+
+def resolve_date(value: Optional[str], today: Optional[date] = None) -> Optional[Tuple[date, date]]:
+    """
+    Turn a parsed date ("today", "tomorrow", "this weekend", "next week" or YYYY-MM-DD) into an
+    inclusive (first day, last day) range relative to `today`. Returns None if it is not recognised.
+    """
+    today = today or date.today()
+    if not value or value == "today":
+        return today, today
+    if value == "tomorrow":
+        day = today + timedelta(days=1)
+        return day, day
+    if value == "this weekend":
+        # On a Sunday "this weekend" is today; otherwise the coming Saturday and Sunday.
+        if today.weekday() == 6:
+            return today, today
+        saturday = today + timedelta(days=5 - today.weekday())
+        return saturday, saturday + timedelta(days=1)
+    if value == "next week":
+        monday = today + timedelta(days=7 - today.weekday())
+        return monday, monday + timedelta(days=6)
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        return None
+    return day, day
+
+
+def normalize_inputs(inputs: dict, today: Optional[date] = None) -> dict:
+    """
+    Canonical form of parsed inputs for cache keys: relative dates resolved to concrete days
+    (so "today" keys change at midnight), text case- and whitespace-folded, preferences sorted.
+    """
+    def fold(value: Optional[str]) -> str:
+        return " ".join((value or "").split()).casefold()
+
+    resolved = resolve_date(inputs.get("date"), today)
+    preferences = {fold(preference) for preference in (inputs.get("preferences") or "").split(",")}
+    return {
+        "location": fold(inputs.get("location")),
+        "start": resolved[0].isoformat() if resolved else fold(inputs.get("date")),
+        "end": resolved[1].isoformat() if resolved else fold(inputs.get("date")),
+        "preferences": sorted(preference for preference in preferences if preference),
+        "event_name": fold(inputs.get("event_name")),
+    }
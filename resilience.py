@@ -0,0 +1,250 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Mapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Statuses worth retrying: throttling and server-side failures.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ResilienceError(Exception):
+    """
+    Base class for errors raised by the resilience layer.
+    """
+
+
+class RetryableError(ResilienceError):
+    """
+    Raised by a call attempt to signal a transient failure (429, 5xx, connection error).
+    `retry_after` is the server's requested delay in seconds, if it sent one.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, status: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+
+class CircuitOpenError(ResilienceError):
+    """
+    Raised without calling upstream while the circuit breaker is open.
+    """
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Convert a Retry-After header (delta-seconds or HTTP date) to seconds from now.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def check_status(status: int, headers: Mapping[str, str]) -> None:
+    """
+    Raise RetryableError for a throttled or failed response so the attempt is retried.
+    """
+    if status in RETRYABLE_STATUSES:
+        raise RetryableError(f"HTTP {status}", retry_after=parse_retry_after(headers.get("Retry-After")), status=status)
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter: `rate` requests per second on average, bursts up to `capacity`.
+    Callers reserve a token and sleep until it is due, so waiting callers are served in order.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take one token and return how long the caller must wait before using it.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive upstream failures. After `reset_timeout`
+    seconds one trial call is let through (half-open); its outcome closes or re-opens the circuit.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError("Circuit breaker is open; upstream is failing.")
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                raise CircuitOpenError("Circuit breaker is half-open; a trial call is already in flight.")
+            self._trial_in_flight = True
+
+    def release(self) -> None:
+        """
+        End a call without counting it either way.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+@dataclass
+class ResilienceMetrics:
+    """
+    Counters for one upstream: attempts, retries, how long callers were throttled,
+    and how many calls the breaker rejected.
+    """
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    failures: int = 0
+    throttled_seconds: float = 0.0
+    backoff_seconds: float = 0.0
+    rejected_by_breaker: int = 0
+
+
+class Resilience:
+    """
+    Rate limiting, retries with exponential backoff and jitter (honoring Retry-After),
+    and a circuit breaker around calls to one upstream API. Share one instance per upstream.
+    """
+
+    def __init__(self, name: str, rate: float, burst: Optional[float] = None, max_attempts: int = 4,
+                 base_delay: float = 0.5, max_delay: float = 30.0, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, sleep: Callable[[float], None] = time.sleep):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.metrics = ResilienceMetrics()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def _count(self, **increments) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self.metrics, name, getattr(self.metrics, name) + value)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full-jitter exponential backoff for the given (1-based) failed attempt.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, attempt_fn: Callable[[], T]) -> T:
+        """
+        Run `attempt_fn`, retrying while it raises RetryableError. Other exceptions propagate
+        immediately. Raises CircuitOpenError without calling upstream while the breaker is open.
+        """
+        self._count(calls=1)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self._count(rejected_by_breaker=1)
+                raise
+            wait = self.bucket.reserve()
+            if wait:
+                self._count(throttled_seconds=wait)
+                self._sleep(wait)
+            self._count(attempts=1)
+            try:
+                result = attempt_fn()
+            except RetryableError as e:
+                if e.status == 429:
+                    # Throttled, not down: back off without tripping the breaker.
+                    self.breaker.release()
+                else:
+                    self.breaker.record_failure()
+                self._count(failures=1)
+                if attempt == self.max_attempts:
+                    raise
+                if self.breaker.state == CircuitBreaker.OPEN:
+                    # This failure tripped the breaker; fail now instead of sleeping until the rejection.
+                    self._count(rejected_by_breaker=1)
+                    raise CircuitOpenError("Circuit breaker is open; upstream is failing.") from e
+                delay = min(self.max_delay, e.retry_after) if e.retry_after is not None else self.backoff(attempt)
+                logging.warning(f"{self.name}: attempt {attempt} failed ({e}); retrying in {delay:.2f}s.")
+                self._count(retries=1, backoff_seconds=delay)
+                self._sleep(delay)
+                continue
+            except Exception:
+                # The upstream answered (e.g. a 4xx), so it is reachable; don't count it against it.
+                self.breaker.record_success()
+                raise
+            except BaseException:
+                # Interrupted (KeyboardInterrupt, SystemExit): says nothing about the upstream.
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+        raise AssertionError("unreachable")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = asdict(self.metrics)
+        stats["breaker_state"] = self.breaker.state
+        return stats
@@ -0,0 +1,139 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cache import content_hash
+from chunking import estimate_tokens, split_into_chunks
+
+# Bump when the on-disk format or tokenization changes, so old index files are rebuilt.
+INDEX_VERSION = 1
+
+_TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how in is it its of on or that the this to "
+    "was were what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class ChunkIndex:
+    """
+    BM25 index over the chunks of one document, so a question can be answered from the
+    few most relevant chunks instead of the whole page. Scoring walks only the postings of
+    the query terms. Indexes are saved as JSON, keyed by the hash of the document and the
+    chunking parameters, so a repeat run loads the index instead of re-chunking.
+    """
+
+    def __init__(self, chunks: List[str], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        for chunk_id, chunk in enumerate(chunks):
+            terms = tokenize(chunk)
+            self.lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                self.postings.setdefault(term, {})[chunk_id] = count
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    @classmethod
+    def build(cls, text: str, chunk_tokens: int = 200) -> "ChunkIndex":
+        return cls(split_into_chunks(text, chunk_tokens) if text.strip() else [])
+
+    def idf(self, term: str) -> float:
+        matching = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.chunks) - matching + 0.5) / (matching + 0.5))
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """
+        BM25 score of every chunk containing at least one query term.
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for chunk_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / (self.average_length or 1))
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[int, float]]:
+        """
+        The `k` best (chunk_id, score) pairs, best first.
+        """
+        return sorted(self.scores(query).items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def search_many(self, queries: Iterable[str], k: int = 4) -> List[List[Tuple[int, float]]]:
+        return [self.search(query, k) for query in queries]
+
+    def context_for(self, query: str, k: int = 4, max_tokens: Optional[int] = None) -> str:
+        """
+        The top-k chunks for `query`, within `max_tokens` if given, joined in document order
+        so the excerpts read naturally. Falls back to the opening chunks if nothing matches.
+        """
+        hits = [chunk_id for chunk_id, _ in self.search(query, k)] or list(range(min(k, len(self.chunks))))
+        selected, used = [], 0
+        for chunk_id in hits:
+            cost = estimate_tokens(self.chunks[chunk_id])
+            if max_tokens is not None and selected and used + cost > max_tokens:
+                break
+            selected.append(chunk_id)
+            used += cost
+        return "\n\n[...]\n\n".join(self.chunks[chunk_id] for chunk_id in sorted(selected))
+
+    def to_dict(self) -> dict:
+        return {"version": INDEX_VERSION, "k1": self.k1, "b": self.b, "chunks": self.chunks,
+                "lengths": self.lengths, "postings": self.postings}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChunkIndex":
+        index = cls.__new__(cls)
+        index.chunks = data["chunks"]
+        index.k1 = data["k1"]
+        index.b = data["b"]
+        index.lengths = data["lengths"]
+        # JSON object keys are strings; chunk ids are ints.
+        index.postings = {term: {int(chunk_id): tf for chunk_id, tf in postings.items()}
+                          for term, postings in data["postings"].items()}
+        index.average_length = sum(index.lengths) / len(index.lengths) if index.lengths else 0.0
+        return index
+
+    def save(self, path: str) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ChunkIndex"]:
+        """
+        Load a saved index, or return None if it is missing, unreadable or from an older version.
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls.from_dict(data) if data.get("version") == INDEX_VERSION else None
+
+    @classmethod
+    def for_document(cls, text: str, directory: str, chunk_tokens: int = 200) -> "ChunkIndex":
+        """
+        Load the index for this exact document from `directory`, building and saving it on first use.
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, content_hash({"text": text, "chunk_tokens": chunk_tokens}) + ".json")
+        index = cls.load(path)
+        if index is None:
+            index = cls.build(text, chunk_tokens)
+            index.save(path)
+        return index
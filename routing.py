@@ -0,0 +1,165 @@
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Collection, Dict, List, Optional, TypeVar
+
+from chunking import estimate_tokens
+from tracing import tracer
+
+T = TypeVar("T")
+
+# Phrases that mark an answer the model itself was not confident in.
+LOW_CONFIDENCE_RE = re.compile(
+    r"\b(i'?m not (sure|certain)|i (do not|don'?t) know|i (cannot|can'?t|am unable to) (help|answer|determine)|"
+    r"as an ai( language model)?|not enough information)\b",
+    re.IGNORECASE,
+)
+
+# Returned by the completion clients when the response had no message content.
+EMPTY_CONTENT = "No response content."
+
+
+def check_output(text: Optional[str], min_words: int = 5) -> Optional[str]:
+    """
+    Why `text` should be escalated to a larger model ("empty", "malformed" or "low_confidence"),
+    or None if it looks usable.
+    """
+    if text is None or not text.strip() or text.strip() == EMPTY_CONTENT:
+        return "empty"
+    if len(text.split()) < min_words:
+        return "malformed"
+    if LOW_CONFIDENCE_RE.search(text):
+        return "low_confidence"
+    return None
+
+
+@dataclass
+class ModelTier:
+    """
+    One model of a cascade. Inputs estimated above `max_input_tokens` skip this tier.
+    """
+    model: str
+    max_input_tokens: Optional[int] = None
+
+
+@dataclass
+class ModelStats:
+    """
+    Per-model counters. Token counts are estimated from the input and output text.
+    `escalated` attempts were rejected and handed to the next model.
+    """
+    calls: int = 0
+    accepted: int = 0
+    escalated: int = 0
+    errors: int = 0
+    latency: float = 0.0
+    max_latency: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    reasons: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "accepted": self.accepted,
+            "escalated": self.escalated,
+            "errors": self.errors,
+            "escalation_rate": round(self.escalated / self.calls, 4) if self.calls else 0.0,
+            "mean_latency": round(self.latency / self.calls, 4) if self.calls else 0.0,
+            "max_latency": round(self.max_latency, 4),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "reasons": dict(self.reasons),
+        }
+
+
+class ModelRouter:
+    """
+    Model cascade: each request goes to the cheapest tier its input fits (tasks listed in
+    `large_tasks` start at the largest), and its output is checked with `validate`. Empty,
+    malformed or low-confidence output, or an exception, is retried on the next tier. The
+    last tier's output is returned as-is, and its exceptions propagate.
+    """
+
+    def __init__(self, name: str, tiers: List[ModelTier], large_tasks: Collection[str] = ()):
+        if not tiers:
+            raise ValueError("A router needs at least one model tier.")
+        self.name = name
+        self.tiers = tiers
+        self.large_tasks = frozenset(large_tasks)
+        self.requests = 0
+        self.escalated_requests = 0
+        self._stats: Dict[str, ModelStats] = {tier.model: ModelStats() for tier in tiers}
+        self._lock = threading.Lock()
+
+    def route(self, task: str, input_tokens: int) -> List[str]:
+        """
+        The models to try for this request, cheapest first. The largest model is always last.
+        """
+        if task in self.large_tasks:
+            return [self.tiers[-1].model]
+        models = [tier.model for tier in self.tiers[:-1]
+                  if tier.max_input_tokens is None or input_tokens <= tier.max_input_tokens]
+        return models + [self.tiers[-1].model]
+
+    def _record(self, model: str, latency: float, prompt_tokens: int, completion_tokens: int,
+                reason: Optional[str], escalated: bool, error: bool) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(model, ModelStats())
+            stats.calls += 1
+            stats.latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.errors += error
+            if reason is not None:
+                stats.reasons[reason] = stats.reasons.get(reason, 0) + 1
+            if escalated:
+                stats.escalated += 1
+            elif reason is None:
+                stats.accepted += 1
+
+    def run(self, task: str, input_tokens: int, call: Callable[[str], T],
+            validate: Callable[[Optional[str]], Optional[str]] = check_output,
+            text: Callable[[T], Optional[str]] = lambda result: result) -> T:
+        """
+        Run `call(model)` down the cascade until `validate(text(result))` accepts the output.
+        """
+        models = self.route(task, input_tokens)
+        with self._lock:
+            self.requests += 1
+        for position, model in enumerate(models):
+            last = position == len(models) - 1
+            start = time.perf_counter()
+            with tracer.span("model_route", category="llm", router=self.name, task=task, model=model) as span:
+                try:
+                    result = call(model)
+                except Exception as e:
+                    self._record(model, time.perf_counter() - start, input_tokens, 0, "error", not last, True)
+                    span.set(reason="error")
+                    if last:
+                        raise
+                    logging.warning(f"{self.name}: {task} failed on {model} ({e}); escalating to {models[position + 1]}.")
+                    continue
+                output = text(result) if result is not None else None
+                reason = validate(output)
+                span.set(reason=reason or "accepted")
+            self._record(model, time.perf_counter() - start, input_tokens, estimate_tokens(output or ""),
+                         reason, reason is not None and not last, False)
+            if reason is None or last:
+                if position > 0:
+                    with self._lock:
+                        self.escalated_requests += 1
+                return result
+            logging.info(f"{self.name}: {task} output from {model} was {reason}; escalating to {models[position + 1]}.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "escalated_requests": self.escalated_requests,
+                "escalation_rate": round(self.escalated_requests / self.requests, 4) if self.requests else 0.0,
+                "models": {model: stats.as_dict() for model, stats in self._stats.items()},
+            }
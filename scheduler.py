@@ -0,0 +1,148 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+@dataclass
+class TaskNode:
+    """
+    A unit of work in a TaskGraph. `fn` is called with one keyword argument per dependency,
+    holding that dependency's result.
+    """
+    name: str
+    fn: Callable[..., Any]
+    depends_on: Sequence[str] = ()
+
+
+@dataclass
+class TaskTiming:
+    """
+    When a task became ready, started and finished, relative to the start of the run (seconds).
+    """
+    name: str
+    depends_on: Sequence[str]
+    ready: float
+    started: float
+    finished: float
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+    @property
+    def queued(self) -> float:
+        return self.started - self.ready
+
+
+@dataclass
+class GraphRun:
+    """
+    Results and timings of one TaskGraph execution.
+    """
+    results: Dict[str, Any]
+    timings: Dict[str, TaskTiming]
+    wall_time: float
+    critical_path: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        """
+        Render per-task timings as a small table, marking tasks on the critical path.
+        """
+        lines = [f"{'task':<24}{'start':>9}{'duration':>10}{'queued':>9}  critical"]
+        for timing in sorted(self.timings.values(), key=lambda t: t.started):
+            marker = "*" if timing.name in self.critical_path else ""
+            lines.append(
+                f"{timing.name:<24}{timing.started:>8.2f}s{timing.duration:>9.2f}s{timing.queued:>8.2f}s  {marker}"
+            )
+        lines.append(f"wall time {self.wall_time:.2f}s, critical path: {' -> '.join(self.critical_path)}")
+        return "\n".join(lines)
+
+
+class TaskGraph:
+    """
+    Dependency-aware scheduler: independent tasks run in parallel on a thread pool and a task
+    starts as soon as every task it depends on has finished.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, TaskNode] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], depends_on: Sequence[str] = ()) -> "TaskGraph":
+        if name in self.nodes:
+            raise ValueError(f"Task '{name}' is already defined.")
+        self.nodes[name] = TaskNode(name, fn, tuple(depends_on))
+        return self
+
+    def _validate(self) -> None:
+        for node in self.nodes.values():
+            for dep in node.depends_on:
+                if dep not in self.nodes:
+                    raise ValueError(f"Task '{node.name}' depends on unknown task '{dep}'.")
+        # Kahn's algorithm: if not every node can be ordered there is a cycle.
+        remaining = {name: set(node.depends_on) for name, node in self.nodes.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dependency cycle between tasks: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def run(self, max_workers: Optional[int] = None) -> GraphRun:
+        """
+        Execute the graph and return every task's result with its timing.
+        The first task to fail cancels whatever has not started yet and its exception is re-raised.
+        """
+        self._validate()
+        results: Dict[str, Any] = {}
+        timings: Dict[str, TaskTiming] = {}
+        pending = dict(self.nodes)
+        origin = time.perf_counter()
+
+        def execute(node: TaskNode, ready_at: float):
+            started = time.perf_counter() - origin
+            value = node.fn(**{dep: results[dep] for dep in node.depends_on})
+            finished = time.perf_counter() - origin
+            return value, TaskTiming(node.name, node.depends_on, ready_at, started, finished)
+
+        with ThreadPoolExecutor(max_workers=max_workers or max(len(self.nodes), 1)) as executor:
+            running = {}
+
+            def submit_ready():
+                for name in [n for n, node in pending.items() if all(d in results for d in node.depends_on)]:
+                    node = pending.pop(name)
+                    ready_at = time.perf_counter() - origin
+                    running[executor.submit(execute, node, ready_at)] = name
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        value, timing = future.result()
+                    except BaseException:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    results[name] = value
+                    timings[name] = timing
+                submit_ready()
+
+        wall_time = time.perf_counter() - origin
+        return GraphRun(results, timings, wall_time, self._critical_path(timings))
+
+    def _critical_path(self, timings: Dict[str, TaskTiming]) -> List[str]:
+        """
+        Walk back from the last task to finish through whichever dependency finished last.
+        """
+        if not timings:
+            return []
+        current = max(timings.values(), key=lambda t: t.finished)
+        path = [current.name]
+        while current.depends_on:
+            current = max((timings[dep] for dep in current.depends_on), key=lambda t: t.finished)
+            path.append(current.name)
+        return list(reversed(path))
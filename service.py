@@ -0,0 +1,326 @@
+"""
+Long-running recommendation service. The LLM client, agents and HTTP connection pools are
+created once and kept warm; requests are queued with backpressure and run on a fixed pool
+of worker threads.
+
+    POST /recommend   {"query": "music events in Dhaka today"}  ->  200 with the recommendation,
+                      503 when the queue is full or no worker could start, 504 when it takes
+                      longer than --timeout, 500 when the server is misconfigured
+    GET  /stats       queue depth, in-flight requests, counters and latency percentiles
+    GET  /healthz     liveness check (503 once every worker failed its setup)
+
+Usage: python service.py [--port 8080] [--workers 4] [--queue-size 32] [--timeout 300]
+"""
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+# Latency samples kept for the percentiles in /stats
+LATENCY_WINDOW = 1000
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class QueueFullError(Exception):
+    """
+    Raised by `submit` when the request queue is at capacity.
+    """
+
+
+class WorkerSetupError(Exception):
+    """
+    Set on queued requests, and raised by `submit`, once every worker has failed `worker_setup()`.
+    """
+
+
+@dataclass
+class ServiceCounters:
+    """
+    Lifetime request counters.
+    """
+    accepted: int = 0
+    rejected: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    skipped: int = 0
+
+
+class RecommendationService:
+    """
+    Bounded queue in front of `workers` threads running `process(query, state)`, where `state`
+    is the per-worker object returned by `worker_setup()` (e.g. the worker's warm agents).
+    """
+
+    def __init__(self, process: Callable, workers: int = 4, queue_size: int = 32,
+                 worker_setup: Optional[Callable] = None):
+        self.process = process
+        self.worker_setup = worker_setup
+        self.workers = workers
+        self.queue_size = queue_size
+        self.counters = ServiceCounters()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queue_waits: deque = deque(maxlen=LATENCY_WINDOW)
+        self._run_times: deque = deque(maxlen=LATENCY_WINDOW)
+        self._threads = []
+        self._failed_workers = 0
+        self._setup_error: Optional[Exception] = None
+        self._started_at = time.time()
+
+    def start(self) -> "RecommendationService":
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"recommend-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        for thread in self._threads:
+            # Workers whose setup failed have already exited and will not take their sentinel.
+            if thread.is_alive():
+                self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _count(self, **increments) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self.counters, name, getattr(self.counters, name) + value)
+
+    def record_timeout(self) -> None:
+        self._count(timed_out=1)
+
+    def submit(self, query: str) -> Future:
+        """
+        Queue a query and return a Future for its result. Raises QueueFullError instead of waiting.
+        """
+        future: Future = Future()
+        # Checked under the lock so nothing is queued after _setup_failed() has drained the queue.
+        with self._lock:
+            if self.unavailable:
+                raise WorkerSetupError(f"No worker is available: setup failed with {self._setup_error!r}.")
+            try:
+                self._queue.put_nowait((query, future, time.perf_counter()))
+            except queue.Full:
+                self.counters.rejected += 1
+                raise QueueFullError(f"Request queue is full ({self.queue_size} waiting).")
+            self.counters.accepted += 1
+        return future
+
+    @property
+    def unavailable(self) -> bool:
+        return self._failed_workers >= self.workers
+
+    def _setup_failed(self, error: Exception) -> None:
+        """
+        Record a worker whose setup raised; once none is left, fail everything still queued.
+        """
+        with self._lock:
+            self._failed_workers += 1
+            self._setup_error = error
+            if not self.unavailable:
+                return
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(WorkerSetupError(f"No worker is available: setup failed with {error!r}."))
+                self._count(failed=1)
+
+    def _worker(self) -> None:
+        state = None
+        if self.worker_setup is not None:
+            try:
+                state = self.worker_setup()
+            except Exception as e:
+                logging.exception(f"Worker setup failed; this worker will not serve requests: {e}")
+                self._setup_failed(e)
+                return
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            query, future, enqueued_at = item
+            if not future.set_running_or_notify_cancel():
+                # The caller timed out while this was queued; nobody is waiting for the result.
+                self._count(skipped=1)
+                continue
+            started = time.perf_counter()
+            with self._lock:
+                self._in_flight += 1
+                self._queue_waits.append(started - enqueued_at)
+            try:
+                future.set_result(self.process(query, state))
+                self._count(succeeded=1)
+            except Exception as e:
+                logging.error(f"Recommendation for {query!r} failed: {e}")
+                future.set_exception(e)
+                self._count(failed=1)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._run_times.append(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits, runs = list(self._queue_waits), list(self._run_times)
+            stats = {
+                "uptime": round(time.time() - self._started_at, 1),
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "queue_depth": self._queue.qsize(),
+                "in_flight": self._in_flight,
+                "failed_workers": self._failed_workers,
+                **asdict(self.counters),
+            }
+        stats["queue_wait_ms"] = {f"p{p}": round(percentile(waits, p) * 1000, 1) for p in (50, 95, 99)}
+        stats["run_time_ms"] = {f"p{p}": round(percentile(runs, p) * 1000, 1) for p in (50, 95, 99)}
+        return stats
+
+
+def make_handler(service: RecommendationService, timeout: float, extra_stats: Optional[Callable[[], dict]] = None):
+    """
+    Build the HTTP handler class serving the JSON API for `service`.
+    """
+
+    class ServiceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            logging.debug(format % args)
+
+        def _send_json(self, status: int, payload, headers: Optional[dict] = None) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                if service.unavailable:
+                    self._send_json(503, {"status": "unavailable"})
+                else:
+                    self._send_json(200, {"status": "ok"})
+            elif self.path == "/stats":
+                stats = service.stats()
+                if extra_stats is not None:
+                    stats.update(extra_stats())
+                self._send_json(200, stats)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/recommend":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                query = request["query"]
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {"error": 'Expected a JSON body like {"query": "music events in Dhaka today"}.'})
+                return
+            try:
+                future = service.submit(query)
+            except QueueFullError as e:
+                self._send_json(503, {"error": str(e)}, {"Retry-After": "1"})
+                return
+            except WorkerSetupError as e:
+                self._send_json(503, {"error": str(e)})
+                return
+            try:
+                self._send_json(200, future.result(timeout=timeout))
+            except FutureTimeoutError:
+                # Drop the job if it is still queued; one already running finishes unobserved.
+                future.cancel()
+                service.record_timeout()
+                self._send_json(504, {"error": f"No result within {timeout:.0f}s."})
+            except WorkerSetupError as e:
+                self._send_json(503, {"error": str(e)})
+            except ValueError as e:
+                # A query the parser rejects. Configuration errors (crew.ConfigurationError) are
+                # not ValueErrors and fall through to 500.
+                self._send_json(400, {"error": str(e)})
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+
+    return ServiceHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="Recommendations run at once")
+    parser.add_argument("--queue-size", type=int, default=32, help="Requests allowed to wait before 503s")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds a request waits for its result")
+    parser.add_argument("--prefetch-weather", action="store_true", help="Warm the forecast cache for popular cities")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+    import crew
+    import hasdata_client
+    from weather import get_weather_service, prefetch_popular
+
+    # Warm everything once: the LLM client, the HasData pool and (optionally) the forecast cache.
+    # Each worker builds its own agents on start and reuses them for every request it serves.
+    crew.get_llm()
+    if crew.CREW_MODEL_ROUTING:
+        crew.get_llm(crew.CREW_SMALL_MODEL)
+    hasdata_client.get_pool()
+    if args.prefetch_weather:
+        logging.info(f"Prefetched {prefetch_popular()} daily forecasts.")
+
+    def extra_stats():
+        return {
+            "trace": crew.tracer.summary(),
+            "result_cache": crew.get_result_cache().stats(),
+            "hasdata_cache": hasdata_client.cache_stats(),
+            "hasdata_resilience": hasdata_client.resilience.stats(),
+            "hasdata_in_flight": hasdata_client.in_flight.stats.as_dict(),
+            "weather_cache": get_weather_service().cache.stats.as_dict(),
+            "model_routing": crew.get_crew_router().stats(),
+        }
+
+    service = RecommendationService(
+        lambda query, agents: crew.recommend(query, agents),
+        workers=args.workers,
+        queue_size=args.queue_size,
+        worker_setup=crew.build_agents,
+    ).start()
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(service, args.timeout, extra_stats))
+    httpd.daemon_threads = True
+    logging.info(f"Serving recommendations on http://{args.host}:{args.port} with {args.workers} workers.")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """
+    `executed` calls went upstream; `coalesced` callers shared an identical call already in flight.
+    """
+    executed: int = 0
+    coalesced: int = 0
+
+    def as_dict(self) -> dict:
+        stats = asdict(self)
+        total = self.executed + self.coalesced
+        stats["coalesced_rate"] = round(self.coalesced / total, 4) if total else 0.0
+        return stats
+
+
+class SingleFlight:
+    """
+    In-flight de-duplication: while a call for a key is running, identical calls wait for
+    its result instead of repeating it. Works across threads (`do`) and asyncio tasks
+    (`do_async`), and a caller of one kind can wait on a call started by the other.
+    All waiters receive the same result object (or exception), so treat it as read-only.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.stats = SingleFlightStats()
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable):
+        """
+        Return (future, leader): the shared future for `key` and whether this caller must run the call.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.stats.executed += 1
+            return future, True
+
+    def _finish(self, key: Hashable) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Run `fn()` unless an identical call is already in flight, in which case wait for its result.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._finish(key)
+        future.set_result(result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        asyncio variant of `do`: await `fn()` unless an identical call is already in flight.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._finish(key)
+        future.set_result(result)
+        return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,400 @@
+import argparse
+import json
+import os
+import random
+import signal
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+def make_self_signed_cert(directory: str) -> Tuple[str, str]:
+    """
+    Generate a throwaway self-signed certificate for localhost using the openssl CLI.
+    Returns the (certfile, keyfile) paths.
+    """
+    certfile = os.path.join(directory, "stub-cert.pem")
+    keyfile = os.path.join(directory, "stub-key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", keyfile, "-out", certfile, "-days", "1",
+            "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return certfile, keyfile
+
+
+def sample_completion(model: str, content: str):
+    """
+    Build an OpenAI-compatible `/chat/completions` payload.
+    """
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(content.split()), "total_tokens": len(content.split())},
+    }
+
+
+def sample_events(query: str, count: int = 10, start: int = 0, total: int = 0):
+    """
+    Build a HasData-shaped `/scrape/google/events` payload: `count` events from offset `start`,
+    or fewer once `total` events (if set) have been served.
+    """
+    stop = start + count if not total else min(start + count, total)
+    return {
+        "requestMetadata": {"status": "ok", "query": query, "start": start},
+        "events": [
+            {
+                "title": f"Sample event {i} for {query}",
+                "date": {"startDate": "Feb 15", "when": "Sat, Feb 15, 6 PM"},
+                "address": ["Stub Venue", "Dhaka"],
+                "description": "A locally generated event used for benchmarking.",
+                "thumbnail": f"https://example.invalid/thumb/{i}.png",
+                "link": f"https://example.invalid/events/{i}",
+            }
+            for i in range(start, stop)
+        ],
+    }
+
+
+def sample_geocoding(name: str):
+    """
+    Build an Open-Meteo-shaped `/v1/search` payload with deterministic coordinates for `name`.
+    """
+    seed = zlib.crc32(name.casefold().encode("utf-8"))
+    return {"results": [{"name": name, "latitude": (seed % 18000) / 100 - 90, "longitude": (seed % 36000) / 100 - 180}]}
+
+
+def sample_forecast(latitude: float, longitude: float, start: str, end: str):
+    """
+    Build an Open-Meteo-shaped `/v1/forecast` daily payload for start..end (inclusive),
+    deterministic for a given location and day.
+    """
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    days = [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+    seeds = [zlib.crc32(f"{latitude:.2f},{longitude:.2f},{day}".encode("ascii")) for day in days]
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "daily": {
+            "time": days,
+            "weather_code": [(0, 1, 2, 3, 61, 80, 95)[seed % 7] for seed in seeds],
+            "temperature_2m_max": [20 + seed % 15 for seed in seeds],
+            "temperature_2m_min": [12 + seed % 8 for seed in seeds],
+            "precipitation_probability_max": [seed % 100 for seed in seeds],
+            "wind_speed_10m_max": [5 + seed % 30 for seed in seeds],
+        },
+    }
+
+
+@dataclass
+class StubConfig:
+    """
+    Shape of the stub responses: added latency (plus uniform jitter) per response, the share of
+    requests answered with `error_status`, and payload sizes (events per search, words per
+    completion, bytes per documentation page). `completion_text` is used when `completion_words` is 0.
+    With `site_pages`, documentation pages link to each other as a site of that many pages.
+    `events_total` caps the events available across all pages of a search (0: unlimited).
+    """
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    events_count: int = 10
+    events_total: int = 0
+    completion_words: int = 0
+    completion_text: str = "This is a locally generated completion used for testing streaming clients."
+    page_bytes: int = 64 * 1024
+    token_delay: float = 0.0
+    site_pages: int = 0
+
+    def completion(self) -> str:
+        if not self.completion_words:
+            return self.completion_text
+        words = self.completion_text.split()
+        return " ".join(words[i % len(words)] for i in range(self.completion_words))
+
+
+def sample_page(path: str, size: int, site_pages: int = 0) -> bytes:
+    """
+    Build an HTML documentation page of roughly `size` bytes, laid out like the Read the Docs
+    theme the real docs site uses (sidebar, then the content inside the "wy-nav-content" wrappers).
+    With `site_pages`, its sidebar links to the site index and to a few other pages of
+    /docs/page-0/ ... /docs/page-<site_pages - 1>/.
+    """
+    paragraph = (
+        "<p>This locally generated documentation paragraph describes agents, tasks and crews "
+        "so that content extraction and summarization can be benchmarked offline.</p>\n"
+    )
+    nav = "Home | Docs"
+    if site_pages:
+        page = zlib.crc32(path.encode("utf-8"))
+        targets = sorted({(page + step * 7) % site_pages for step in range(1, 4)} | {0})
+        nav = " | ".join(f'<a href="../page-{target}/#top">Page {target}</a>' for target in targets)
+    head = (
+        f"<html><head><title>Stub page {path}</title></head><body class=\"wy-body-for-nav\">"
+        f"<div class=\"wy-grid-for-nav\"><nav class=\"wy-nav-side\">{nav}</nav>"
+        "<section class=\"wy-nav-content-wrap\"><div class=\"wy-nav-content\"><div class=\"rst-content\">"
+        "<div role=\"navigation\" aria-label=\"breadcrumbs\">Docs &raquo; Stub</div>"
+        f"<div role=\"main\" class=\"document\"><h1>{path}</h1>\n"
+    )
+    tail = "</div><footer>Stub footer</footer></div></div></section></div></body></html>\n"
+    repeats = max(1, (size - len(head) - len(tail)) // len(paragraph))
+    return (head + paragraph * repeats + tail).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Keep-alive request handler answering the HasData events endpoint, the Groq chat
+    completions endpoint (plain JSON, or an SSE stream when `"stream": true`), the Open-Meteo
+    geocoding and forecast endpoints and HTML pages under `/docs/`. Responses are shaped by
+    the server's StubConfig.
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self) -> StubConfig:
+        return getattr(self.server, "stub_config", None) or StubConfig()
+
+    def _delay_and_maybe_fail(self) -> bool:
+        """
+        Apply the configured latency; answer with an injected error and return True if this request fails.
+        """
+        config = self.config
+        delay = config.latency + (random.uniform(0, config.latency_jitter) if config.latency_jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        if config.error_rate and random.random() < config.error_rate:
+            self._send_json(config.error_status, {"error": f"injected {config.error_status}"})
+            return True
+        return False
+
+    def _send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/scrape/google/events":
+            if self._delay_and_maybe_fail():
+                return
+            params = parse_qs(parsed.query)
+            start = int(params.get("start", ["0"])[0])
+            self._send_json(200, sample_events(params.get("q", [""])[0], self.config.events_count, start,
+                                               self.config.events_total))
+        elif parsed.path in ("/v1/search", "/v1/forecast"):
+            if self._delay_and_maybe_fail():
+                return
+            params = {name: values[0] for name, values in parse_qs(parsed.query).items()}
+            if parsed.path == "/v1/search":
+                self._send_json(200, sample_geocoding(params.get("name", "")))
+            else:
+                self._send_json(200, sample_forecast(float(params["latitude"]), float(params["longitude"]),
+                                                     params["start_date"], params["end_date"]))
+        elif parsed.path.startswith("/docs/"):
+            if self._delay_and_maybe_fail():
+                return
+            body = sample_page(parsed.path, self.config.page_bytes, self.config.site_pages)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _read_json_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream_completion(self, model: str, content: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        token_delay = self.config.token_delay
+        for i, word in enumerate(content.split(" ")):
+            token = word if i == 0 else " " + word
+            chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            self._send_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            if token_delay:
+                time.sleep(token_delay)
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        if parsed.path != "/openai/v1/chat/completions":
+            self._send_json(404, {"error": "not found"})
+            return
+        request = self._read_json_body()
+        if self._delay_and_maybe_fail():
+            return
+        model = request.get("model", "stub-model")
+        if request.get("stream"):
+            self._stream_completion(model, self.config.completion())
+        else:
+            self._send_json(200, sample_completion(model, self.config.completion()))
+
+
+def scripted_handler(responses: List[Tuple[int, Dict[str, str]]], base=StubHandler):
+    """
+    Build a handler class that answers its first requests with the scripted (status, headers)
+    pairs, e.g. [(429, {"Retry-After": "1"}), (503, {})], then behaves like `base`.
+    Requests served so far are counted in the class attribute `requests_seen`.
+    """
+    script = list(responses)
+    lock = threading.Lock()
+
+    class ScriptedHandler(base):
+        requests_seen = 0
+
+        def _next_scripted(self):
+            with lock:
+                type(self).requests_seen += 1
+                return script.pop(0) if script else None
+
+        def _send_scripted(self, status: int, headers: Dict[str, str]) -> None:
+            body = json.dumps({"error": f"scripted {status}"}).encode("utf-8")
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            scripted = self._next_scripted()
+            if scripted is None:
+                super().do_GET()
+            else:
+                self._send_scripted(*scripted)
+
+        def do_POST(self):
+            scripted = self._next_scripted()
+            if scripted is None:
+                super().do_POST()
+                return
+            # Drain the request body so the keep-alive connection stays usable.
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._send_scripted(*scripted)
+
+    return ScriptedHandler
+
+
+class StubServer:
+    """
+    Local threaded HTTP(S) server running in a background thread.
+    Use as a context manager; `host` and `port` are available once started.
+    With tls=True, `cafile` is the self-signed certificate clients should trust.
+    """
+
+    def __init__(self, handler_class=StubHandler, tls: bool = False, host: str = "127.0.0.1",
+                 config: Optional[StubConfig] = None, port: int = 0):
+        self.handler_class = handler_class
+        self.tls = tls
+        self.host = host
+        self.config = config if config is not None else StubConfig()
+        self.port: Optional[int] = port or None
+        self.cafile: Optional[str] = None
+        self.client_context: Optional[ssl.SSLContext] = None
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+
+    @property
+    def base_url(self) -> str:
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://{self.host}:{self.port}"
+
+    def start(self) -> "StubServer":
+        self._httpd = ThreadingHTTPServer((self.host, self.port or 0), self.handler_class)
+        self._httpd.daemon_threads = True
+        self._httpd.stub_config = self.config
+        if self.tls:
+            self._tmpdir = tempfile.TemporaryDirectory()
+            certfile, keyfile = make_self_signed_cert(self._tmpdir.name)
+            server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            server_context.load_cert_chain(certfile, keyfile)
+            # Handshake in the per-connection thread, not in the accept loop.
+            self._httpd.socket = server_context.wrap_socket(
+                self._httpd.socket, server_side=True, do_handshake_on_connect=False
+            )
+            self.cafile = certfile
+            self.client_context = ssl.create_default_context(cafile=certfile)
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    """
+    Run a stub server in the foreground. The first stdout line is a JSON object with
+    `base_url` and `cafile`, so a parent process (e.g. bench.py) can connect to it.
+    """
+    defaults = StubConfig()
+    parser = argparse.ArgumentParser(description="Local stand-in for the HasData and Groq APIs.")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--tls", action="store_true")
+    for name, value in asdict(defaults).items():
+        if name != "completion_text":
+            parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+    config = StubConfig(**{name: getattr(args, name) for name in asdict(defaults) if name != "completion_text"})
+    # Exit through the context manager on SIGTERM so the certificate directory is removed.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    with StubServer(tls=args.tls, config=config, port=args.port) as server:
+        print(json.dumps({"base_url": server.base_url, "cafile": server.cafile}), flush=True)
+        try:
+            server._thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
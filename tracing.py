@@ -0,0 +1,166 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional
+
+# Attributes summed per stage in the summary table.
+SUMMED_ATTRIBUTES = ("bytes_in", "bytes_out", "prompt_tokens", "completion_tokens")
+
+# Spans kept in memory (oldest are dropped first); 0 keeps every span.
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "10000"))
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """
+    One timed stage. `start` and `end` are epoch seconds; `attrs` holds sizes, token counts, etc.
+    """
+    name: str
+    category: str
+    start: float
+    end: Optional[float] = None
+    thread_id: int = 0
+    parent: Optional[str] = None
+    attrs: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """
+    In-process span recorder. Spans can be exported as a Chrome trace file (open it in
+    chrome://tracing or https://ui.perfetto.dev) and aggregated into a per-stage table;
+    nothing is sent anywhere. Only the most recent `max_spans` spans are kept, so batch and
+    service runs do not grow without bound.
+    """
+
+    def __init__(self, process_name: str = "crew", max_spans: int = TRACE_MAX_SPANS):
+        self.process_name = process_name
+        self.spans: Deque[Span] = deque(maxlen=max_spans or None)
+        self._lock = threading.Lock()
+        # perf_counter is monotonic and precise; anchor it to the wall clock once.
+        self._epoch_offset = time.time() - time.perf_counter()
+
+    def now(self) -> float:
+        return self._epoch_offset + time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **attrs):
+        """
+        Time the body of a `with` block; yields the Span so attributes can be added as they are known.
+        """
+        parent = _current_span.get()
+        span = Span(name, category, self.now(), thread_id=threading.get_ident(),
+                    parent=parent.name if parent is not None else None, attrs=dict(attrs))
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=repr(e))
+            raise
+        finally:
+            span.end = self.now()
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def record(self, name: str, start: float, end: float, category: str = "stage", **attrs) -> Span:
+        """
+        Add a span measured elsewhere (e.g. by a library callback), given epoch-second bounds.
+        """
+        parent = _current_span.get()
+        span = Span(name, category, start, end, threading.get_ident(),
+                    parent.name if parent is not None else None, dict(attrs))
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def keep_last(self, max_spans: int) -> None:
+        """
+        Bound memory in long-running processes: keep only the most recent `max_spans` spans.
+        """
+        with self._lock:
+            self.spans = deque(self.spans, maxlen=max_spans)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Spans in the Chrome Trace Event format ("X" complete events, microseconds).
+        """
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.process_name}}]
+        for span in spans:
+            args = dict(span.attrs)
+            if span.parent:
+                args["parent"] = span.parent
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round(span.start * 1e6),
+                "dur": round(span.duration * 1e6),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Aggregate spans by name: count, total/mean/max duration and summed size/token attributes.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        stages: Dict[str, dict] = {}
+        for span in spans:
+            stage = stages.setdefault(span.name, {"count": 0, "total": 0.0, "max": 0.0,
+                                                  **{attr: 0 for attr in SUMMED_ATTRIBUTES}})
+            stage["count"] += 1
+            stage["total"] += span.duration
+            stage["max"] = max(stage["max"], span.duration)
+            for attr in SUMMED_ATTRIBUTES:
+                value = span.attrs.get(attr)
+                if isinstance(value, (int, float)):
+                    stage[attr] += value
+        for stage in stages.values():
+            stage["mean"] = stage["total"] / stage["count"]
+        return stages
+
+    def summary_table(self) -> str:
+        """
+        Render `summary()` as a fixed-width table, slowest stages first.
+        """
+        stages = sorted(self.summary().items(), key=lambda item: item[1]["total"], reverse=True)
+        lines = [f"{'stage':<32}{'count':>6}{'total':>10}{'mean':>10}{'max':>10}{'bytes in':>10}"
+                 f"{'bytes out':>11}{'prompt tok':>12}{'compl tok':>11}"]
+        for name, s in stages:
+            lines.append(
+                f"{name:<32}{s['count']:>6}{s['total']:>9.3f}s{s['mean']:>9.3f}s{s['max']:>9.3f}s"
+                f"{s['bytes_in']:>10}{s['bytes_out']:>11}{s['prompt_tokens']:>12}{s['completion_tokens']:>11}"
+            )
+        return "\n".join(lines)
+
+
+# Process-wide tracer used by the pipeline modules.
+tracer = Tracer()
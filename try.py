@@ -110,9 +110,24 @@
 import requests
 from dotenv import load_dotenv
 import os
+import asyncio
+import json
 import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
+
+from chunking import estimate_tokens, split_into_chunks
+from html_extract import DEFAULT_MAX_BYTES, ExtractionStats, extract_text_from_stream
+from cache import SQLiteCache, content_hash
+from http_cache import HTTPCache
+from resilience import Resilience, ResilienceError, RetryableError, check_status
+from routing import ModelRouter, ModelTier
+from singleflight import SingleFlight
+from tracing import tracer
 
 # Load environment variables
 load_dotenv()
@@ -128,6 +143,59 @@ GROC_API_KEY = os.getenv("GROC_API_KEY")
 if not GROC_API_KEY:
     raise ValueError("GROC API Key not found. Please set it in the .env file.")
 
+# Connections kept open per host by the shared HTTP session
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+# Shared retry / rate-limit / circuit-breaker policy for Groq completions.
+# GROQ_RATE_LIMIT is requests per second allowed by our API quota (30/minute by default).
+GROQ_RESILIENCE = Resilience(
+    "groq",
+    rate=float(os.getenv("GROQ_RATE_LIMIT", "0.5")),
+    burst=float(os.getenv("GROQ_RATE_BURST", "5")),
+    max_attempts=int(os.getenv("GROQ_MAX_ATTEMPTS", "4")),
+)
+
+# Concurrent identical completion requests share one upstream call
+COMPLETIONS_IN_FLIGHT = SingleFlight("groq")
+
+# Model cascade for summaries: requests go to GROQ_SMALL_MODEL first (when the prompt is at most
+# GROQ_SMALL_MAX_INPUT_TOKENS) and escalate to GROQ_LARGE_MODEL on a poor answer.
+# MODEL_ROUTING=0 sends everything to the large model.
+GROQ_SMALL_MODEL = os.getenv("GROQ_SMALL_MODEL", "llama-3.1-8b-instant")
+GROQ_LARGE_MODEL = os.getenv("GROQ_LARGE_MODEL", "llama-3.3-70b-versatile")
+GROQ_SMALL_MAX_INPUT_TOKENS = int(os.getenv("GROQ_SMALL_MAX_INPUT_TOKENS", "4000"))
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "1") == "1"
+# Tasks that skip the small model: merging partial summaries is where small models lose detail
+GROQ_LARGE_TASKS = [task.strip() for task in os.getenv("GROQ_LARGE_TASKS", "combine_summaries").split(",") if task.strip()]
+
+def build_summary_router() -> Optional[ModelRouter]:
+    """
+    The Groq summary cascade, or None when MODEL_ROUTING is off.
+    """
+    if not MODEL_ROUTING:
+        return None
+    return ModelRouter("groq", [
+        ModelTier(GROQ_SMALL_MODEL, max_input_tokens=GROQ_SMALL_MAX_INPUT_TOKENS),
+        ModelTier(GROQ_LARGE_MODEL),
+    ], large_tasks=GROQ_LARGE_TASKS)
+
+_thread_state = threading.local()
+
+def get_session() -> requests.Session:
+    """
+    Return this thread's requests session, so every fetch and completion made on a thread reuses
+    its pooled keep-alive connections instead of opening a new one per call. requests.Session is
+    not thread-safe, so each worker thread (map-reduce, the async front-ends) gets its own.
+    """
+    session = getattr(_thread_state, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _thread_state.session = session
+    return session
+
 @dataclass
 class CrewAIAgent:
     """
@@ -147,57 +215,232 @@ class CrewAIAgent:
         "API-Driven Processing"
     ])
 
+@dataclass
+class StreamStats:
+    """
+    Timing of a streamed completion, filled in while tokens arrive.
+    Each SSE content delta is counted as one token.
+    """
+    time_to_first_token: Optional[float] = None
+    tokens: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def tokens_per_sec(self) -> float:
+        generation_time = self.elapsed - (self.time_to_first_token or 0.0)
+        return self.tokens / generation_time if generation_time > 0 else 0.0
+
+@dataclass
+class MapReduceStats:
+    """
+    Per-stage report of a map-reduce summarization: chunk count and the wall-clock
+    latency of the map stage and of each reduce level.
+    """
+    chunks: int = 0
+    failed_chunks: int = 0
+    map_latency: float = 0.0
+    reduce_latencies: List[float] = field(default_factory=list)
+    total_latency: float = 0.0
+
 class BaseAgent:
     """
     Base class for interacting with APIs, providing a flexible and reusable structure.
     Handles request preparation and response parsing.
+
+    Optionally caches completions in `cache`, any object with get(key)/set(key, value) such as
+    cache.TTLCache (in memory) or cache.SQLiteCache (on disk). With cache_policy="deterministic"
+    only temperature-0 calls are cached; "always" caches every call. Identical requests made
+    while one is in flight wait for its answer (see `in_flight`) instead of repeating it.
     """
 
-    def __init__(self, api_key: str, base_url: str, model: str):
+    def __init__(self, api_key: str, base_url: str, model: str, cache=None, cache_policy: str = "deterministic",
+                 resilience: Optional[Resilience] = None, in_flight: Optional[SingleFlight] = None):
+        if cache_policy not in ("deterministic", "always"):
+            raise ValueError("cache_policy must be 'deterministic' or 'always'.")
         self.api_key = api_key
         self.base_url = base_url
         self.model = model
+        self.cache = cache
+        self.cache_policy = cache_policy
+        self.resilience = resilience if resilience is not None else GROQ_RESILIENCE
+        self.in_flight = in_flight if in_flight is not None else COMPLETIONS_IN_FLIGHT
 
-    def _send_request(self, messages: List[dict], max_tokens: int = 300, temperature: float = 0.7) -> Optional[str]:
+    def _post(self, payload: dict, headers: dict, stream: bool = False) -> requests.Response:
         """
-        Send a request to the API with the given messages and parameters.
-        Returns the processed response content or None on failure.
+        POST through this thread's pooled session under this agent's rate limit, retry and circuit-breaker policy.
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
+        def attempt():
+            try:
+                response = get_session().post(self.base_url, json=payload, headers=headers, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                raise RetryableError(f"Connection to the API failed: {e}") from e
+            try:
+                check_status(response.status_code, response.headers)
+            except RetryableError:
+                response.close()
+                raise
+            return response
+        return self.resilience.call(attempt)
+
+    def _cache_key(self, messages: List[dict], max_tokens: int, temperature: float, model: str) -> Optional[str]:
+        """
+        Content-addressed key for a completion request, or None if the call must not be cached.
+        """
+        if self.cache is None or (self.cache_policy == "deterministic" and temperature != 0):
+            return None
+        return "completion:" + content_hash({
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        })
+
+    def _send_request(self, messages: List[dict], max_tokens: int = 300, temperature: float = 0.7,
+                      model: Optional[str] = None) -> Optional[str]:
+        """
+        Send a request to the API with the given messages and parameters, on `model` if given
+        instead of the agent's default. Returns the processed response content or None on failure.
+        """
+        model = model or self.model
+        cache_key = self._cache_key(messages, max_tokens, temperature, model)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logging.info("Completion served from cache.")
+                return cached
         payload = {
-            "model": self.model,
+            "model": model,
             "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature,
         }
+        request_key = content_hash({"url": self.base_url, "api_key": self.api_key, "payload": payload})
+        return self.in_flight.do(request_key, lambda: self._complete(payload, cache_key))
+
+    def _complete(self, payload: dict, cache_key: Optional[str]) -> Optional[str]:
+        """
+        Make the completion call upstream and cache its content under `cache_key`, if given.
+        """
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
         try:
             logging.info("Sending request to the API...")
-            response = requests.post(self.base_url, json=payload, headers=headers)
-            response.raise_for_status()
-            content = response.json().get("choices", [{}])[0].get("message", {}).get("content", "No response content.")
+            with tracer.span("groq_completion", category="llm", model=payload["model"]) as span:
+                response = self._post(payload, headers)
+                response.raise_for_status()
+                body = response.json()
+                usage = body.get("usage") or {}
+                span.set(
+                    bytes_out=len(response.request.body or b""),
+                    bytes_in=len(response.content),
+                    prompt_tokens=usage.get("prompt_tokens", 0),
+                    completion_tokens=usage.get("completion_tokens", 0),
+                )
+            content = body.get("choices", [{}])[0].get("message", {}).get("content", "No response content.")
             logging.info("Response received successfully.")
+            if cache_key is not None:
+                self.cache.set(cache_key, content)
             return content
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ResilienceError) as e:
             logging.error(f"Error interacting with the API: {e}")
             return None
 
+    def _stream_request(self, messages: List[dict], max_tokens: int = 300, temperature: float = 0.7,
+                        stats: Optional[StreamStats] = None, model: Optional[str] = None) -> Iterator[str]:
+        """
+        Send a streaming request and yield content tokens as the server-sent events arrive.
+        Pass a StreamStats to get time-to-first-token and tokens/sec; the stream ends early on failure.
+        A cached completion is replayed as a single chunk, and a stream that completes is cached.
+        """
+        stats = stats if stats is not None else StreamStats()
+        model = model or self.model
+        cache_key = self._cache_key(messages, max_tokens, temperature, model)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logging.info("Completion served from cache.")
+                stats.time_to_first_token = stats.elapsed = 0.0
+                stats.tokens = 1
+                yield cached
+                return
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream",
+        }
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }
+        tokens: List[str] = []
+        completed = False
+        start = time.perf_counter()
+        try:
+            logging.info("Sending streaming request to the API...")
+            with self._post(payload, headers, stream=True) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        completed = True
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    token = choices[0].get("delta", {}).get("content")
+                    if not token:
+                        continue
+                    if stats.time_to_first_token is None:
+                        stats.time_to_first_token = time.perf_counter() - start
+                    stats.tokens += 1
+                    tokens.append(token)
+                    yield token
+        except (requests.exceptions.RequestException, ResilienceError, ValueError) as e:
+            logging.error(f"Error streaming from the API: {e}")
+        finally:
+            stats.elapsed = time.perf_counter() - start
+        if completed and cache_key is not None and tokens:
+            self.cache.set(cache_key, "".join(tokens))
+        logging.info(
+            f"Stream finished: first token after {stats.time_to_first_token or 0.0:.2f}s, "
+            f"{stats.tokens} tokens at {stats.tokens_per_sec:.1f} tokens/sec."
+        )
+
 class SummaryAgent(BaseAgent):
     """
     Specialized agent for summarizing content with role-specific context.
     Uses a CrewAIAgent profile to enhance request messages.
+
+    With a `router` (see routing.py), each request is tried on the cheapest model its input
+    suits and escalated to a larger one when the summary is empty, malformed or hedged.
+    Summaries are sampled at `temperature`; at 0 they are cacheable under either cache policy.
     """
 
-    def __init__(self, api_key: str, agent_profile: CrewAIAgent):
-        super().__init__(api_key, base_url="https://api.groq.com/openai/v1/chat/completions", model="llama-3.3-70b-versatile")
+    def __init__(self, api_key: str, agent_profile: CrewAIAgent, cache=None, cache_policy: str = "deterministic",
+                 resilience: Optional[Resilience] = None, router: Optional[ModelRouter] = None,
+                 temperature: float = 0.7):
+        super().__init__(api_key, base_url="https://api.groq.com/openai/v1/chat/completions", model=GROQ_LARGE_MODEL,
+                         cache=cache, cache_policy=cache_policy, resilience=resilience)
         self.agent_profile = agent_profile
+        self.router = router
+        self.temperature = temperature
 
-    def summarize(self, content: str) -> Optional[str]:
+    def _routed_request(self, task: str, messages: List[dict]) -> Optional[str]:
         """
-        Summarize the provided content based on the agent's contextual understanding.
+        Send `messages` through the router when there is one, else on the agent's model.
         """
+        if self.router is None:
+            return self._send_request(messages, temperature=self.temperature)
+        input_tokens = estimate_tokens("".join(message["content"] for message in messages))
+        return self.router.run(task, input_tokens,
+                               lambda model: self._send_request(messages, temperature=self.temperature, model=model))
+
+    def _summary_messages(self, content: str) -> List[dict]:
         system_context = (
             f"You are {self.agent_profile.name}, a {self.agent_profile.role}. "
             f"Your goal is to {self.agent_profile.goal}. "
@@ -207,7 +450,92 @@ class SummaryAgent(BaseAgent):
             {"role": "system", "content": system_context},
             {"role": "user", "content": f"Analyze and summarize the following content, focusing on key insights: {content}"},
         ]
-        return self._send_request(messages)
+        return messages
+
+    def summarize(self, content: str) -> Optional[str]:
+        """
+        Summarize the provided content based on the agent's contextual understanding.
+        """
+        return self._routed_request("summarize", self._summary_messages(content))
+
+    def summarize_stream(self, content: str, stats: Optional[StreamStats] = None) -> Iterator[str]:
+        """
+        Like `summarize`, but yield the summary token by token as it is generated. Tokens already
+        shown cannot be taken back, so a routed stream uses the first model chosen without escalating.
+        """
+        messages = self._summary_messages(content)
+        model = None
+        if self.router is not None:
+            model = self.router.route("summarize", estimate_tokens("".join(m["content"] for m in messages)))[0]
+        return self._stream_request(messages, temperature=self.temperature, stats=stats, model=model)
+
+    def _summarize_chunk(self, chunk: str, index: int, total: int) -> Optional[str]:
+        messages = self._summary_messages(chunk)
+        messages[1]["content"] = (
+            f"This is part {index + 1} of {total} of a larger document. "
+            f"Analyze and summarize this part, focusing on key insights: {chunk}"
+        )
+        return self._routed_request("summarize_chunk", messages)
+
+    def _combine_summaries(self, summaries: List[str]) -> Optional[str]:
+        messages = self._summary_messages("")
+        joined = "\n\n".join(f"Part {i + 1}:\n{summary}" for i, summary in enumerate(summaries))
+        messages[1]["content"] = (
+            "Combine the following partial summaries of one document into a single coherent summary, "
+            f"keeping the key insights and removing repetition:\n\n{joined}"
+        )
+        return self._routed_request("combine_summaries", messages)
+
+    def summarize_map_reduce(self, content: str, chunk_tokens: int = 3000, concurrency: int = 4,
+                             stats: Optional[MapReduceStats] = None) -> Optional[str]:
+        """
+        Summarize content too large for one prompt: split it into chunks of about `chunk_tokens`,
+        summarize up to `concurrency` chunks at a time, then merge the partial summaries in
+        rounds until one remains. Pass a MapReduceStats to get per-stage latency.
+        """
+        stats = stats if stats is not None else MapReduceStats()
+        start = time.perf_counter()
+        chunks = split_into_chunks(content, chunk_tokens)
+        stats.chunks = len(chunks)
+        if len(chunks) <= 1:
+            summary = self.summarize(content)
+            stats.map_latency = stats.total_latency = time.perf_counter() - start
+            return summary
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            stage_start = time.perf_counter()
+            results = list(executor.map(lambda args: self._summarize_chunk(*args),
+                                        [(chunk, i, len(chunks)) for i, chunk in enumerate(chunks)]))
+            stats.map_latency = time.perf_counter() - stage_start
+            partials = [summary for summary in results if summary]
+            stats.failed_chunks = len(results) - len(partials)
+            logging.info(f"Map stage: {len(partials)}/{len(chunks)} chunks summarized in {stats.map_latency:.2f}s.")
+            if not partials:
+                return None
+
+            # Reduce hierarchically: merge as many partial summaries as fit in one prompt budget.
+            while len(partials) > 1:
+                groups, current = [], []
+                for summary in partials:
+                    if len(current) >= 2 and estimate_tokens("\n\n".join(current + [summary])) > chunk_tokens:
+                        groups.append(current)
+                        current = []
+                    current.append(summary)
+                groups.append(current)
+                if len(groups[-1]) == 1 and len(groups) > 1:
+                    groups[-2].extend(groups.pop())
+
+                stage_start = time.perf_counter()
+                merged = list(executor.map(self._combine_summaries, groups))
+                latency = time.perf_counter() - stage_start
+                stats.reduce_latencies.append(latency)
+                logging.info(f"Reduce level {len(stats.reduce_latencies)}: {len(partials)} -> {len(groups)} summaries in {latency:.2f}s.")
+                if any(summary is None for summary in merged):
+                    return None
+                partials = merged
+
+        stats.total_latency = time.perf_counter() - start
+        return partials[0]
 
 class ContentFetcher:
     """
@@ -215,47 +543,211 @@ class ContentFetcher:
     """
 
     @staticmethod
-    def fetch(url: str) -> Optional[str]:
+    def fetch(url: str, extract_text: bool = True, max_bytes: int = DEFAULT_MAX_BYTES,
+              stats: Optional[ExtractionStats] = None, cache: Optional[HTTPCache] = None) -> Optional[str]:
         """
         Fetch and return the content from the given URL.
-        Returns None if an error occurs.
+        By default the body is streamed through an HTML-to-text extractor so only the main
+        content is returned; pass extract_text=False for the raw body. At most `max_bytes`
+        are read. With a `cache`, fresh pages are served locally and stale ones are
+        revalidated with a conditional GET; truncated pages are not cached. Returns None if an error occurs.
         """
+        stats = stats if stats is not None else ExtractionStats()
+        variant = "text" if extract_text else "raw"
+        cached = cache.lookup(url, variant) if cache is not None else None
+        if cached is not None and cached.is_fresh:
+            logging.info(f"Serving fresh cached content for URL: {url}")
+            return cached.body
         try:
             logging.info(f"Fetching content from URL: {url}")
-            response = requests.get(url)
-            response.raise_for_status()
-            logging.info("Content fetched successfully.")
-            return response.text
+            headers = cached.conditional_headers() if cached is not None else {}
+            with get_session().get(url, headers=headers, stream=True) as response:
+                if response.status_code == 304 and cached is not None:
+                    logging.info("Content not modified; using cached copy.")
+                    return cache.revalidated(cached, response.headers, variant)
+                response.raise_for_status()
+                is_html = "html" in response.headers.get("Content-Type", "text/html")
+                content = extract_text_from_stream(
+                    response.iter_content(chunk_size=16384),
+                    encoding=response.encoding or "utf-8",
+                    max_bytes=max_bytes,
+                    is_html=extract_text and is_html,
+                    stats=stats,
+                )
+                # A page cut off at max_bytes is not the page; caching it would serve the
+                # truncated text to later calls with a larger limit.
+                if cache is not None and not stats.truncated:
+                    cache.store(url, content, response.headers, variant)
+            logging.info(
+                f"Content fetched successfully: {stats.bytes_in} bytes in, {stats.chars_out} chars "
+                f"(~{stats.tokens_out} tokens) out, {stats.reduction:.0%} smaller"
+                + (" (truncated)" if stats.truncated else "") + "."
+            )
+            return content
         except requests.exceptions.RequestException as e:
             logging.error(f"Error fetching content from URL: {e}")
             return None
 
+@dataclass
+class SummaryResult:
+    """
+    Outcome of summarizing one URL; `summary` is None if fetching or summarizing failed.
+    """
+    url: str
+    summary: Optional[str]
+    fetch_latency: float = 0.0
+    summarize_latency: float = 0.0
+
+class AsyncBaseAgent:
+    """
+    asyncio front-end for a BaseAgent. This is not an asyncio HTTP client: each call runs the
+    blocking BaseAgent method on a worker thread (asyncio.to_thread), so the event loop stays
+    free while several requests are in flight, bounded by the loop's default thread pool. Each
+    worker thread keeps its own pooled keep-alive session (see get_session).
+    """
+
+    def __init__(self, agent: BaseAgent):
+        self.agent = agent
+
+    async def _send_request(self, messages: List[dict], max_tokens: int = 300, temperature: float = 0.7,
+                            model: Optional[str] = None) -> Optional[str]:
+        return await asyncio.to_thread(self.agent._send_request, messages, max_tokens, temperature, model)
+
+class AsyncSummaryAgent(AsyncBaseAgent):
+    """
+    asyncio front-end for a SummaryAgent; `summarize` runs on a worker thread like the other calls.
+    """
+
+    def __init__(self, agent: SummaryAgent):
+        super().__init__(agent)
+
+    async def summarize(self, content: str) -> Optional[str]:
+        return await asyncio.to_thread(self.agent.summarize, content)
+
+class AsyncContentFetcher:
+    """
+    asyncio front-end for ContentFetcher (the blocking fetch runs on a worker thread); accepts the
+    same keyword arguments.
+    """
+
+    @staticmethod
+    async def fetch(url: str, **kwargs) -> Optional[str]:
+        return await asyncio.to_thread(ContentFetcher.fetch, url, **kwargs)
+
+async def summarize_urls(urls: Iterable[str], summary_agent: SummaryAgent, concurrency: int = 4,
+                         **fetch_kwargs) -> AsyncIterator[SummaryResult]:
+    """
+    Fetch and summarize many URLs at once, yielding each result as soon as it is ready.
+    Fetches and completions are limited to `concurrency` each, so one page can be fetched
+    while another is being summarized.
+    """
+    agent = AsyncSummaryAgent(summary_agent)
+    fetch_slots = asyncio.Semaphore(concurrency)
+    completion_slots = asyncio.Semaphore(concurrency)
+
+    async def process(url: str) -> SummaryResult:
+        result = SummaryResult(url=url, summary=None)
+        start = time.perf_counter()
+        async with fetch_slots:
+            content = await AsyncContentFetcher.fetch(url, **fetch_kwargs)
+        result.fetch_latency = time.perf_counter() - start
+        if not content:
+            return result
+        start = time.perf_counter()
+        async with completion_slots:
+            result.summary = await agent.summarize(content)
+        result.summarize_latency = time.perf_counter() - start
+        return result
+
+    tasks = [asyncio.ensure_future(process(url)) for url in urls]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def summarize_urls_sync(urls: Iterable[str], summary_agent: SummaryAgent, concurrency: int = 4,
+                        **fetch_kwargs) -> List[SummaryResult]:
+    """
+    Blocking wrapper around `summarize_urls`; returns results in completion order.
+    """
+    async def collect():
+        return [result async for result in summarize_urls(urls, summary_agent, concurrency, **fetch_kwargs)]
+    return asyncio.run(collect())
+
+# Pages estimated above this many tokens are summarized with map-reduce
+MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("MAP_REDUCE_THRESHOLD_TOKENS", "3000"))
+
+# Directory for cached pages (conditional GET with ETag / Last-Modified)
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".http_cache")
+
+# URLs fetched and summarized at once when several are given on the command line
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+
+# Optional sqlite file for caching completions across runs (opt-in)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+
+# Which completions LLM_CACHE_PATH keeps: "deterministic" (temperature-0 calls only) or "always"
+# (sampled completions too, so a rerun replays the same summary)
+LLM_CACHE_POLICY = os.getenv("LLM_CACHE_POLICY", "deterministic")
+
+# Summaries are sampled at 0.7, or at 0 when they are to be cached under the deterministic policy
+SUMMARY_TEMPERATURE = 0.0 if LLM_CACHE_PATH and LLM_CACHE_POLICY == "deterministic" else 0.7
+
 def main():
     """
     Main function to orchestrate the process:
     - Fetch content from a URL.
     - Use CrewAIAgent and SummaryAgent to process the content.
     - Output the summarized content.
+    URLs given on the command line are summarized concurrently instead.
     """
     # Create the Crew AI Agent profile
     content_agent = CrewAIAgent()
+    router = build_summary_router()
+
+    if len(sys.argv) > 1:
+        completion_cache = SQLiteCache(LLM_CACHE_PATH) if LLM_CACHE_PATH else None
+        summary_agent = SummaryAgent(api_key=GROC_API_KEY, agent_profile=content_agent, cache=completion_cache,
+                                     cache_policy=LLM_CACHE_POLICY, router=router, temperature=SUMMARY_TEMPERATURE)
+        for result in summarize_urls_sync(sys.argv[1:], summary_agent, concurrency=SUMMARY_CONCURRENCY,
+                                          cache=HTTPCache(HTTP_CACHE_DIR)):
+            print(f"\n{result.url} (fetch {result.fetch_latency:.2f}s, summarize {result.summarize_latency:.2f}s):")
+            print(result.summary or "Failed to fetch or summarize this URL.")
+        if router is not None:
+            logging.info(f"Model routing: {json.dumps(router.stats())}")
+        return
     
     # URL to fetch content from
     url = "https://documentation-using-ai-agent.readthedocs.io/en/latest/features/"
     
-    # Fetch the content
-    content = ContentFetcher.fetch(url)
+    # Fetch the content, reusing the local copy when the server says it is unchanged
+    content = ContentFetcher.fetch(url, cache=HTTPCache(HTTP_CACHE_DIR))
     if content:
         # Initialize the SummaryAgent with the CrewAIAgent profile
-        summary_agent = SummaryAgent(api_key=GROC_API_KEY, agent_profile=content_agent)
+        completion_cache = SQLiteCache(LLM_CACHE_PATH) if LLM_CACHE_PATH else None
+        summary_agent = SummaryAgent(api_key=GROC_API_KEY, agent_profile=content_agent, cache=completion_cache,
+                                     cache_policy=LLM_CACHE_POLICY, router=router, temperature=SUMMARY_TEMPERATURE)
         
-        # Summarize the fetched content
-        summary = summary_agent.summarize(content)
+        # Summarize the fetched content: large pages go through map-reduce,
+        # small ones are streamed as the tokens arrive
+        if estimate_tokens(content) > MAP_REDUCE_THRESHOLD_TOKENS:
+            summary = summary_agent.summarize_map_reduce(content, chunk_tokens=MAP_REDUCE_THRESHOLD_TOKENS)
+            print("Summary:\n", summary)
+        else:
+            print("Summary:\n", end=" ", flush=True)
+            summary = ""
+            for token in summary_agent.summarize_stream(content):
+                summary += token
+                print(token, end="", flush=True)
+            print()
         if summary:
             logging.info("Summary successfully generated.")
-            print("Summary:\n", summary)
         else:
             logging.warning("Failed to generate a summary.")
+        if router is not None:
+            logging.info(f"Model routing: {json.dumps(router.stats())}")
     else:
         logging.warning("Failed to fetch content from the provided URL.")
 
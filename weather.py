@@ -0,0 +1,303 @@
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from cache import TTLCache
+from query_parser import resolve_date
+from resilience import Resilience, RetryableError, check_status
+
+# WMO weather interpretation codes, as returned by Open-Meteo, grouped into plain conditions.
+WMO_CONDITIONS = {
+    0: "clear sky", 1: "mainly clear", 2: "partly cloudy", 3: "overcast",
+    45: "fog", 48: "fog",
+    51: "light drizzle", 53: "drizzle", 55: "heavy drizzle", 56: "freezing drizzle", 57: "freezing drizzle",
+    61: "light rain", 63: "rain", 65: "heavy rain", 66: "freezing rain", 67: "freezing rain",
+    71: "light snow", 73: "snow", 75: "heavy snow", 77: "snow grains",
+    80: "rain showers", 81: "rain showers", 82: "violent rain showers", 85: "snow showers", 86: "snow showers",
+    95: "thunderstorm", 96: "thunderstorm with hail", 99: "thunderstorm with hail",
+}
+
+_UNSUITABLE_CONDITIONS = ("heavy", "snow", "freezing", "thunderstorm", "violent")
+
+
+@dataclass
+class Forecast:
+    """
+    Daily forecast for one location. Temperatures are °C, wind is km/h, precipitation chance is %.
+    """
+    location: str
+    day: str
+    conditions: str
+    temperature_max: Optional[float] = None
+    temperature_min: Optional[float] = None
+    precipitation_chance: Optional[float] = None
+    wind_max: Optional[float] = None
+    source: str = ""
+
+    @property
+    def outdoor_friendly(self) -> bool:
+        if any(word in self.conditions for word in _UNSUITABLE_CONDITIONS):
+            return False
+        if (self.precipitation_chance or 0) >= 50 or (self.wind_max or 0) >= 40:
+            return False
+        return self.temperature_max is None or 5 <= self.temperature_max <= 36
+
+    def describe(self) -> str:
+        parts = [self.conditions]
+        if self.temperature_min is not None and self.temperature_max is not None:
+            parts.append(f"{self.temperature_min:.0f}–{self.temperature_max:.0f}°C")
+        if self.precipitation_chance is not None:
+            parts.append(f"{self.precipitation_chance:.0f}% chance of rain")
+        if self.wind_max is not None:
+            parts.append(f"wind up to {self.wind_max:.0f} km/h")
+        suitability = "good for outdoor activities" if self.outdoor_friendly else "better suited to indoor activities"
+        return f"{self.location} on {self.day}: {', '.join(parts)}; {suitability}."
+
+
+def normalize_location(location: str) -> str:
+    """
+    Case-, punctuation- and whitespace-insensitive form of a location, used for cache keys and lookups.
+    """
+    return " ".join(re.sub(r"[^\w\s-]", " ", location).split()).casefold()
+
+
+class WeatherProvider:
+    """
+    Source of daily forecasts. Subclasses implement `forecast_range`; return an empty list
+    for days the source has no data for.
+    """
+    name = "base"
+
+    def forecast_range(self, location: str, start: date, days: int) -> List[Forecast]:
+        raise NotImplementedError
+
+
+class FileWeatherProvider(WeatherProvider):
+    """
+    Forecasts read from a JSON file shaped {location: {"YYYY-MM-DD": {Forecast fields}}}.
+    Meant for tests, demos and offline runs.
+    """
+    name = "file"
+
+    def __init__(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        self.path = path
+        self._forecasts: Dict[str, Dict[str, dict]] = {normalize_location(loc): days for loc, days in raw.items()}
+
+    def forecast_range(self, location: str, start: date, days: int) -> List[Forecast]:
+        known = self._forecasts.get(normalize_location(location), {})
+        forecasts = []
+        for offset in range(days):
+            day = (start + timedelta(days=offset)).isoformat()
+            if day in known:
+                fields = dict(known[day], location=location, day=day, source=self.name)
+                fields.setdefault("conditions", "unknown")
+                forecasts.append(Forecast(**fields))
+        return forecasts
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """
+    Forecasts from the Open-Meteo geocoding and forecast APIs (no API key needed). Both
+    URLs can point at stub_servers for offline runs. Geocoding results are kept for the
+    life of the provider; one request covers up to 16 days for a location.
+    """
+    name = "open-meteo"
+    GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+    FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+    MAX_DAYS = 16
+    DAILY_FIELDS = "weather_code,temperature_2m_max,temperature_2m_min,precipitation_probability_max,wind_speed_10m_max"
+
+    def __init__(self, geocoding_url: Optional[str] = None, forecast_url: Optional[str] = None,
+                 resilience: Optional[Resilience] = None, timeout: float = 10.0):
+        self.geocoding_url = geocoding_url or self.GEOCODING_URL
+        self.forecast_url = forecast_url or self.FORECAST_URL
+        self.resilience = resilience or Resilience("weather", rate=float(os.getenv("WEATHER_RATE_LIMIT", "10")), burst=20)
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._coordinates: Dict[str, Optional[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, url: str, params: dict) -> dict:
+        def attempt():
+            try:
+                response = self._session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                raise RetryableError(f"Connection to the weather API failed: {e}") from e
+            check_status(response.status_code, response.headers)
+            response.raise_for_status()
+            return response.json()
+        return self.resilience.call(attempt)
+
+    def _geocode(self, location: str) -> Optional[Tuple[float, float]]:
+        key = normalize_location(location)
+        with self._lock:
+            if key in self._coordinates:
+                return self._coordinates[key]
+        results = self._get(self.geocoding_url, {"name": location, "count": 1}).get("results") or []
+        coordinates = (results[0]["latitude"], results[0]["longitude"]) if results else None
+        with self._lock:
+            self._coordinates[key] = coordinates
+        return coordinates
+
+    def forecast_range(self, location: str, start: date, days: int) -> List[Forecast]:
+        days = min(days, self.MAX_DAYS)
+        if start > date.today() + timedelta(days=self.MAX_DAYS - 1):
+            return []
+        coordinates = self._geocode(location)
+        if coordinates is None:
+            return []
+        daily = self._get(self.forecast_url, {
+            "latitude": coordinates[0],
+            "longitude": coordinates[1],
+            "daily": self.DAILY_FIELDS,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=days - 1)).isoformat(),
+            "timezone": "auto",
+        }).get("daily") or {}
+        forecasts = []
+        for i, day in enumerate(daily.get("time", [])):
+            def value(field):
+                values = daily.get(field) or []
+                return values[i] if i < len(values) else None
+            code = value("weather_code")
+            forecasts.append(Forecast(
+                location=location,
+                day=day,
+                conditions=WMO_CONDITIONS.get(code, "unknown"),
+                temperature_max=value("temperature_2m_max"),
+                temperature_min=value("temperature_2m_min"),
+                precipitation_chance=value("precipitation_probability_max"),
+                wind_max=value("wind_speed_10m_max"),
+                source=self.name,
+            ))
+        return forecasts
+
+
+class ForecastCache:
+    """
+    Daily forecasts keyed on (normalized location, day), expiring after `ttl` seconds since
+    forecasts are revised through the day. Backed by cache.TTLCache.
+    """
+
+    def __init__(self, ttl: float = 3 * 3600, max_bytes: int = 8 * 1024 * 1024):
+        self._cache = TTLCache(max_bytes=max_bytes, default_ttl=ttl)
+
+    @staticmethod
+    def key(location: str, day: date) -> str:
+        return f"forecast:{normalize_location(location)}|{day.isoformat()}"
+
+    def get(self, location: str, day: date) -> Optional[Forecast]:
+        fields = self._cache.get(self.key(location, day))
+        return Forecast(**fields) if fields is not None else None
+
+    def set(self, forecast: Forecast) -> None:
+        self._cache.set(self.key(forecast.location, date.fromisoformat(forecast.day)), asdict(forecast))
+
+    @property
+    def stats(self):
+        return self._cache.stats
+
+
+class WeatherService:
+    """
+    Cached forecast lookups on top of a WeatherProvider. A query date such as "this weekend"
+    is resolved to its days; only days missing from the cache are requested, in one call.
+    """
+
+    def __init__(self, provider: WeatherProvider, cache: Optional[ForecastCache] = None):
+        self.provider = provider
+        self.cache = cache if cache is not None else ForecastCache()
+
+    def _fetch(self, location: str, start: date, days: int) -> List[Forecast]:
+        try:
+            forecasts = self.provider.forecast_range(location, start, days)
+        except Exception as e:
+            logging.warning(f"Weather lookup for {location} failed: {e}")
+            return []
+        for forecast in forecasts:
+            self.cache.set(forecast)
+        return forecasts
+
+    def forecasts(self, location: str, date_value: Optional[str], today: Optional[date] = None) -> List[Forecast]:
+        today = today or date.today()
+        location = " ".join(location.split())
+        first, last = resolve_date(date_value, today) or (today, today)
+        days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        found = {day: self.cache.get(location, day) for day in days}
+        missing = [day for day, forecast in found.items() if forecast is None]
+        if missing:
+            for forecast in self._fetch(location, missing[0], (missing[-1] - missing[0]).days + 1):
+                found[date.fromisoformat(forecast.day)] = forecast
+        return [found[day] for day in days if found.get(day) is not None]
+
+    def report(self, location: str, date_value: Optional[str]) -> str:
+        """
+        Plain-text forecast for the given query location and date, one line per day.
+        """
+        forecasts = self.forecasts(location, date_value)
+        if not forecasts:
+            return f"No forecast is available for {location} ({date_value or 'today'})."
+        return "\n".join(forecast.describe() for forecast in forecasts)
+
+    def prefetch(self, locations: Iterable[str], days: int = 7, concurrency: int = 4) -> int:
+        """
+        Warm the cache with the next `days` days for each location, one request per location.
+        Locations whose forecast for today is already cached are skipped. Returns the number of
+        daily forecasts cached.
+        """
+        today = date.today()
+        unique = [loc for loc in {normalize_location(loc): loc for loc in locations if loc}.values()
+                  if self.cache.get(loc, today) is None]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = executor.map(lambda loc: self._fetch(loc, today, days), unique)
+            return sum(len(forecasts) for forecasts in results)
+
+
+# Cities warmed by `prefetch_popular()` (comma-separated WEATHER_PREFETCH_CITIES)
+POPULAR_CITIES = [city.strip() for city in os.getenv(
+    "WEATHER_PREFETCH_CITIES", "Dhaka,Chittagong,Sylhet,Khulna,Rajshahi"
+).split(",") if city.strip()]
+
+_service: Optional[WeatherService] = None
+_service_lock = threading.Lock()
+
+
+def build_provider() -> WeatherProvider:
+    """
+    Provider selected by WEATHER_PROVIDER: "open-meteo" (default; WEATHER_GEOCODING_URL and
+    WEATHER_FORECAST_URL override the endpoints) or "file" (reads WEATHER_FILE).
+    """
+    kind = os.getenv("WEATHER_PROVIDER", "open-meteo")
+    if kind == "file":
+        path = os.getenv("WEATHER_FILE")
+        if not path:
+            raise ValueError("WEATHER_PROVIDER=file needs WEATHER_FILE to point at a forecast JSON file.")
+        return FileWeatherProvider(path)
+    if kind == "open-meteo":
+        return OpenMeteoProvider(os.getenv("WEATHER_GEOCODING_URL"), os.getenv("WEATHER_FORECAST_URL"))
+    raise ValueError(f"Unknown WEATHER_PROVIDER '{kind}'.")
+
+
+def get_weather_service() -> WeatherService:
+    """
+    Return the process-wide weather service, creating it on first use.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = WeatherService(build_provider(), ForecastCache(ttl=float(os.getenv("WEATHER_CACHE_TTL", "10800"))))
+        return _service
+
+
+def prefetch_popular(days: int = 7) -> int:
+    return get_weather_service().prefetch(POPULAR_CITIES, days=days)